@@ -6,12 +6,20 @@
 
 from mpmath import mp
 import itertools
+import cmath
 import functools
+import collections
 import random
+import multiprocessing
+import sys
+import os
+import tempfile
 import pandas as pd
 import numpy as np
 import warnings
 
+from . import spatial
+
 def simple_det(M):
     return M[0,0]*M[1,1]-M[0,1]*M[1,0]
 
@@ -28,9 +36,340 @@ def simple_tr(M):
     """ Trace of a 2x2 matrix. """
     return M[0,0] + M[1,1]
 
+def to_complex128(M):
+    """ Convert a 2x2 matrix (e.g. an mp.matrix) to a 2x2 NumPy array of dtype complex128. """
+    return np.array([[complex(M[0,0]), complex(M[0,1])], [complex(M[1,0]), complex(M[1,1])]], dtype=np.complex128)
+
 class NonUnitDeterminantWarning(RuntimeWarning):
     pass
 
+def approximate_sizeof(obj):
+    """ Give a rough estimate of the memory used by a word or a matrix, in bytes.
+
+        NumPy arrays report their own size; mpmath matrices are estimated from the working precision.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + sys.getsizeof(obj)
+    if isinstance(obj, mp.matrix):
+        # Each complex entry is two mpf's, each holding a mantissa of about mp.prec bits plus object overhead.
+        return obj.rows*obj.cols*2*(mp.prec//8 + 100)
+    return sys.getsizeof(obj)
+
+def _proper_suffixes(word):
+    """ Generate the proper non-empty suffixes of the tuple `word`, longest first. """
+    return (word[start:] for start in range(1, len(word)))
+
+class WordCache:
+    """ A bounded cache from words to values, with least-recently-used eviction.
+
+        The cache holds at most `maxsize` entries and (if `maxbytes` is not None) at most roughly `maxbytes`
+        bytes, as estimated by `approximate_sizeof`; when either bound is exceeded, the least recently used
+        entries are evicted. Setting `maxsize` to None removes the bound on the number of entries.
+
+        The attributes `hits`, `misses`, and `evictions` count what the cache has done since it was last cleared, and
+        `nbytes` is the estimated size of the entries (only kept track of when `maxbytes` is not None).
+    """
+
+    def __init__(self, maxsize=2**16, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._data = collections.OrderedDict()
+        self.clear()
+
+    def clear(self):
+        """ Empty the cache and reset the statistics. """
+        self._data.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, word, default=None):
+        """ Return the value cached for `word` (marking it as recently used), or `default` if there is none. """
+        try:
+            size, value = self._data[word]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(word)
+        self.hits += 1
+        return value
+
+    def first_cached(self, word, suffixes=None):
+        """ Return (index, value) for the first cached word among `word` and then the words of `suffixes(word)` (marking
+            it as recently used), where index 0 is `word` itself; or (None, None) if none of them is cached.
+
+            The shorter words are only asked for (by calling `suffixes`) if `word` is not cached. This counts as a single
+            lookup of `word`: a hit if it is cached, and a miss otherwise, however many of the later words had to be tried.
+        """
+        entry = self._data.get(word)
+        if entry is not None:
+            self._data.move_to_end(word)
+            self.hits += 1
+            return (0, entry[1])
+
+        self.misses += 1
+        if suffixes is not None:
+            for index, suffix in enumerate(suffixes(word), 1):
+                entry = self._data.get(suffix)
+                if entry is not None:
+                    self._data.move_to_end(suffix)
+                    return (index, entry[1])
+        return (None, None)
+
+    def __setitem__(self, word, value):
+        data = self._data
+        if self.maxbytes is None:
+            # Sizes are only estimated (which is not free) when there is a bound on them.
+            data[word] = (0, value)
+            data.move_to_end(word)
+            if self.maxsize is not None:
+                while len(data) > self.maxsize:
+                    data.popitem(last=False)
+                    self.evictions += 1
+            return
+
+        if word in data:
+            self.nbytes -= data.pop(word)[0]
+        size = approximate_sizeof(word) + approximate_sizeof(value)
+        data[word] = (size, value)
+        self.nbytes += size
+
+        while data and ((self.maxsize is not None and len(data) > self.maxsize) or self.nbytes > self.maxbytes):
+            _, (size, _) = data.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def __contains__(self, word):
+        return word in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def info(self):
+        """ Return a dictionary of statistics about the cache. """
+        return { 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self._data),
+                 'maxsize': self.maxsize, 'nbytes': self.nbytes, 'maxbytes': self.maxbytes }
+
+class PrecisionPolicy:
+    """ How a GroupCache evaluates the matrices of words.
+
+        The mode is one of:
+          - 'mp': multiply the mpmath generators (this is the default, and the only mode for fields other than C);
+          - 'double': multiply the generators in complex128 arithmetic;
+          - 'adaptive': multiply in complex128 arithmetic, but track the drift ||det| - 1| of each product, which is zero
+            in exact arithmetic since the generators have determinant ±1; whenever it exceeds `threshold`, the word is
+            re-evaluated from the mpmath generators and only then rounded to complex128.
+
+        Any mpmath arithmetic (in 'mp' mode, and when 'adaptive' mode escalates) is done at `dps` decimal digits, or
+        at the global mp.dps if `dps` is None, so a group need not depend on whatever precision the rest of the program uses.
+
+        The attributes `evaluations`, `escalations` and `max_drift` count what the policy has seen since it was last reset.
+    """
+
+    modes = ('mp', 'double', 'adaptive')
+
+    def __init__(self, mode='mp', dps=None, threshold=1e-10):
+        if mode not in self.modes:
+            raise ValueError(f"unknown precision mode {mode}, expected one of {self.modes}")
+        self.mode = mode
+        self.dps = dps
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        """ Reset the statistics. """
+        self.evaluations = 0
+        self.escalations = 0
+        self.max_drift = 0.0
+
+    def workdps(self):
+        """ A context manager setting the working precision of mpmath arithmetic. """
+        return mp.workdps(self.dps if self.dps is not None else mp.dps)
+
+    def info(self):
+        """ Return a dictionary of statistics about the words evaluated. """
+        return { 'mode': self.mode, 'dps': self.dps, 'threshold': self.threshold, 'evaluations': self.evaluations,
+                 'escalations': self.escalations, 'max_drift': self.max_drift }
+
+class RelatorAutomaton:
+    """ Finite automaton recognising words which start with a relator, for words built up from the right.
+
+        Our Cayley graph walks build words by adding letters on the left, so a word (x_1, ..., x_k) is
+        read by the automaton in the order x_k, ..., x_1. The automaton is the Aho-Corasick automaton of the
+        reversed relators: it is in an accepting state exactly when the letters read so far, i.e. the current
+        word, start with some relator. Once it is compiled, extending a word by one letter costs a single
+        table lookup (`transitions[state][letter]`) no matter how many relators there are.
+    """
+
+    def __init__(self, relators, alphabet_size):
+        """ Compile the automaton for the given relators (tuples of letters in range(alphabet_size)). """
+        transitions = [[None]*alphabet_size]
+        accepting = [False]
+
+        # Trie of reversed relators.
+        for relator in relators:
+            if len(relator) == 0:
+                continue
+            state = 0
+            for letter in reversed(relator):
+                if transitions[state][letter] is None:
+                    transitions.append([None]*alphabet_size)
+                    accepting.append(False)
+                    transitions[state][letter] = len(transitions) - 1
+                state = transitions[state][letter]
+            accepting[state] = True
+
+        # Breadth-first pass to add failure transitions; since failure links always point to shallower states,
+        # when a state is reached its failure state is already complete.
+        failure = [0]*len(transitions)
+        queue = collections.deque()
+        for letter in range(alphabet_size):
+            child = transitions[0][letter]
+            if child is None:
+                transitions[0][letter] = 0
+            else:
+                queue.append(child)
+        while queue:
+            state = queue.popleft()
+            accepting[state] = accepting[state] or accepting[failure[state]]
+            for letter in range(alphabet_size):
+                child = transitions[state][letter]
+                if child is None:
+                    transitions[state][letter] = transitions[failure[state]][letter]
+                else:
+                    failure[child] = transitions[failure[state]][letter]
+                    queue.append(child)
+
+        self.start = 0
+        self.transitions = transitions
+        self.accepting = accepting
+        # The same tables as NumPy arrays, for advancing whole levels of words at once.
+        self.transition_array = np.array(transitions, dtype=np.intp).reshape(len(transitions), alphabet_size)
+        self.accepting_array = np.array(accepting, dtype=bool)
+
+    def state(self, word):
+        """ Return the state reached by the automaton after reading `word` from right to left. """
+        state = self.start
+        for letter in reversed(word):
+            state = self.transitions[state][letter]
+        return state
+
+    def starts_with_relator(self, word):
+        """ Return True if `word` starts with one of the relators. """
+        return self.accepting[self.state(word)]
+
+def chunk_rows(rows, chunk_size, columns=('x','y','colour')):
+    """ Collect an iterable of rows (tuples) into column-oriented chunks.
+
+        Yields: dictionaries { column: NumPy array } with `chunk_size` rows each (except possibly the last),
+        so at most one chunk of rows is held in memory at any time.
+    """
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) == chunk_size:
+            yield { column: np.array(values) for column, values in zip(columns, zip(*buffer)) }
+            buffer = []
+    if buffer:
+        yield { column: np.array(values) for column, values in zip(columns, zip(*buffer)) }
+
+def rechunk(chunks, chunk_size):
+    """ Split or merge column-oriented chunks so that each has `chunk_size` rows (except possibly the last). """
+    pending = []
+    pending_rows = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_rows += len(next(iter(chunk.values())))
+        if pending_rows >= chunk_size:
+            merged = { column: np.concatenate([c[column] for c in pending]) for column in chunk }
+            start = 0
+            while pending_rows - start >= chunk_size:
+                yield { column: values[start:start+chunk_size] for column, values in merged.items() }
+                start += chunk_size
+            pending = [{ column: values[start:] for column, values in merged.items() }]
+            pending_rows -= start
+    if pending_rows > 0:
+        yield { column: np.concatenate([c[column] for c in pending]) for column in pending[0] }
+
+def chunks_to_dataframe(chunks, columns=('x','y','colour')):
+    """ Concatenate column-oriented chunks into a single pandas dataframe. """
+    frames = [pd.DataFrame(chunk) for chunk in chunks]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(columns))
+
+def save_chunks_parquet(chunks, filename):
+    """ Stream column-oriented chunks into a Parquet file, one row group per chunk.
+
+        This needs the optional dependency pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(filename, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def save_chunks_npy(chunks, filename, block_size=2**20):
+    """ Stream column-oriented chunks into a .npy file holding a structured array with one field per column.
+
+        The header of a .npy file records the number of rows, so the chunks are first written to a temporary file
+        next to `filename` and then copied across `block_size` rows at a time.
+    """
+    dtype = None
+    count = 0
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(filename)), delete=False) as raw:
+        for chunk in chunks:
+            if dtype is None:
+                dtype = np.dtype([(column, values.dtype) for column, values in chunk.items()])
+            records = np.empty(len(next(iter(chunk.values()))), dtype=dtype)
+            for column, values in chunk.items():
+                records[column] = values
+            raw.write(records.tobytes())
+            count += len(records)
+
+    try:
+        if dtype is None:
+            dtype = np.dtype([('x', float), ('y', float), ('colour', int)])
+        out = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=(count,))
+        with open(raw.name, 'rb') as f:
+            for start in range(0, count, block_size):
+                block = np.fromfile(f, dtype=dtype, count=min(block_size, count - start))
+                out[start:start+len(block)] = block
+        out.flush()
+        del out
+    finally:
+        os.remove(raw.name)
+
+def accumulate_raster(raster, chunk, extent):
+    """ Add the points of a column-oriented chunk (see `chunk_rows`) into a raster of hit counts, in place.
+
+        The raster is a 2D integer array of shape (height, width) in image orientation, so row 0 is the top
+        edge y = ymax of `extent` = (xmin, xmax, ymin, ymax). If the raster is 3D, of shape (colours, height, width),
+        then each point is counted in the layer given by its colour. Points outside the extent are ignored.
+    """
+    xmin, xmax, ymin, ymax = extent
+    height, width = raster.shape[-2:]
+    x, y = chunk['x'], chunk['y']
+    inside = (x >= xmin) & (x < xmax) & (y > ymin) & (y <= ymax)
+    columns = ((x[inside] - xmin)*(width/(xmax - xmin))).astype(np.intp)
+    rows = ((ymax - y[inside])*(height/(ymax - ymin))).astype(np.intp)
+    index = np.minimum(rows, height - 1)*width + np.minimum(columns, width - 1)
+    if raster.ndim == 3:
+        index += np.asarray(chunk['colour'])[inside].astype(np.intp)*(height*width)
+    # Only the pixels hit are touched, so the cost is proportional to the size of the chunk and not of the raster.
+    if raster.flags.c_contiguous:
+        np.add.at(raster.reshape(-1), index, 1)
+    else:
+        np.add.at(raster, np.unravel_index(index, raster.shape), 1)
+    return raster
+
 # Words are _tuples_ of elements.
 class GroupCache:
     """ Represents a finitely generated group of 2x2 matrices.
@@ -51,7 +390,7 @@ class GroupCache:
         return tuple(reversed(tuple(self.gen_to_inv[x] for x in word)))
 
 
-    def __init__(self, generators, relators=[], names = None, disable_det_warning=False):
+    def __init__(self, generators, relators=[], names = None, disable_det_warning=False, cache_size=2**16, cache_bytes=None, precision=None):
         """ Construct a GroupCache from a finite list of generators and relations.
 
             Arguments:
@@ -59,9 +398,19 @@ class GroupCache:
             relators -- a list of words in the group.
             names -- a list of names for the generators (strings). This is in the order (generator 1), (generator 2), ..., (generator N). Inverses are taken to be the inverse case.
             disable_det_warning -- if using p-adic numbers, this check hits a RecursionError in pyadic. ***DO NOT SET TO True UNLESS YOU KNOW WHAT YOU ARE DOING!!!***
+            cache_size, cache_bytes -- bounds on the number of entries and (approximate) number of bytes held by the word cache, see `WordCache`.
+            precision -- a `PrecisionPolicy`, or one of its modes 'mp', 'double', 'adaptive'; None means PrecisionPolicy('mp').
+                         In the 'double' and 'adaptive' modes, matrices of words are 2x2 complex128 NumPy arrays.
 
         """
 
+        self.cache = WordCache(cache_size, cache_bytes)
+        if precision is None:
+            precision = PrecisionPolicy()
+        elif isinstance(precision, str):
+            precision = PrecisionPolicy(precision)
+        self.precision = precision
+
         if not disable_det_warning:
             for n, g in enumerate(generators):
                 det = simple_det(g)
@@ -75,54 +424,355 @@ class GroupCache:
         inverses = [simple_inv(g) for g in generators]
         self.generators = generators + inverses
         self.gen_to_inv = [r for r in itertools.chain(range(self.length,2*self.length), range(0,self.length))]
+        self.word_base = 2*self.length + 1
         self.relators = relators + [self.inv_word(r) for r in relators] + list(itertools.chain.from_iterable([(g, self.gen_to_inv[g]), (self.gen_to_inv[g], g)] for g in range(0,self.length)))
+        self.automaton = RelatorAutomaton(self.relators, 2*self.length)
         if names != None:
             self.names = names + [(x.swapcase())[::-1] for x in names]
             self.names_reverse_lookup = { name: j for j,name in enumerate(self.names) }
+            self._name_table = None
+            if all(len(name) == 1 and name.isascii() for name in self.names):
+                self._name_table = np.full(256, -1, dtype=np.intp)
+                for name, j in self.names_reverse_lookup.items():
+                    self._name_table[ord(name)] = j
         else:
             self.names = None
             self.names_reverse_lookup = None
+            self._name_table = None
 
         # Weird type introspection to allow us to pass in pyadic types that mpmath doesn't like but numpy is OK with
-        if isinstance(generators[0], np.ndarray):
+        if self.precision.mode != 'mp':
+            self._underlying_matrix_t = lambda rows: np.array(rows, dtype=np.complex128)
+        elif isinstance(generators[0], np.ndarray):
             self._underlying_matrix_t = np.array
         else:
             self._underlying_matrix_t = type(generators[0])
 
+    @functools.cached_property
+    def generator_array(self):
+        """ The generators and their inverses as a (2n, 2, 2) NumPy array of dtype complex128.
+
+            This is the machine-precision backend used by `evaluate_words`; it is only computed
+            when first asked for, since not every field (e.g. pyadic.PAdic) can be cast to complex.
+        """
+        return np.stack([to_complex128(g) for g in self.generators])
+
+    def evaluate_words(self, words):
+        """ Evaluate a batch of words at machine precision.
+
+            Rather than multiplying one letter at a time through `__getitem__`, the words are packed
+            into an integer array (shorter words padded on the right by the identity) and the whole
+            batch is folded together from the right with one batched `np.matmul` per letter position.
+
+            Arguments:
+            words -- a list of words (tuples of generator indices).
+
+            Returns: a NumPy array of shape (len(words), 2, 2) and dtype complex128.
+        """
+        identity_index = 2*self.length
+        padded_generators = np.concatenate([self.generator_array, np.eye(2, dtype=np.complex128)[np.newaxis]])
+
+        words = list(words)
+        length = max((len(w) for w in words), default=0)
+        letters = np.full((len(words), length), identity_index, dtype=np.intp)
+        for n, w in enumerate(words):
+            letters[n,:len(w)] = w
+
+        result = np.broadcast_to(padded_generators[identity_index], (len(words), 2, 2)).copy()
+        for k in reversed(range(length)):
+            result = padded_generators[letters[:,k]] @ result
+        return result
+
+    def evaluate_trie(self, words, machine_precision=False):
+        """ Evaluate a batch of words, sharing the work between words with common suffixes.
+
+            The words are put into a trie keyed on their suffixes (so a word and the word with its first letter removed
+            are parent and child), and the matrix of each node is computed exactly once as (generator) @ (matrix of
+            the parent node). Nodes are evaluated a level at a time; at machine precision, or if `self.precision` is not
+            'mp', each level is one batched NumPy product. The word cache is not used, so the memory needed is bounded by
+            the size of the trie.
+
+            Arguments:
+            words -- a list of words, each a tuple of generator indices, an "abc" string, or an integer code (see `encode_word`).
+
+            Returns: a NumPy array of shape (len(words), 2, 2) and dtype complex128 if `machine_precision` is True
+            or `self.precision` is not 'mp', otherwise a list of matrices; in either case in the order of `words`.
+        """
+        letter_count = 2*self.length
+        parents = [-1]
+        letters = [-1]
+        depths = [0]
+        children = {}
+        ends = []
+
+        for word in words:
+            if isinstance(word, str):
+                word = self._fancyword_letters(word).tolist()
+            elif isinstance(word, (int, np.integer)):
+                word = self.decode_word(word)
+            node = 0
+            for letter in reversed(word):
+                key = node*letter_count + letter
+                child = children.get(key)
+                if child is None:
+                    child = len(parents)
+                    children[key] = child
+                    parents.append(node)
+                    letters.append(letter)
+                    depths.append(depths[node] + 1)
+                node = child
+            ends.append(node)
+        del children
+
+        policy = self.precision
+        if not machine_precision and policy.mode == 'mp':
+            matrices = [self._underlying_matrix_t([[1,0],[0,1]])]
+            with policy.workdps():
+                for node in range(1, len(parents)):
+                    matrices.append(self.generators[letters[node]] @ matrices[parents[node]])
+            return [matrices[node] for node in ends]
+
+        parents = np.array(parents, dtype=np.intp)
+        letters = np.array(letters, dtype=np.intp)
+        depths = np.array(depths, dtype=np.intp)
+        matrices = np.empty((len(parents), 2, 2), dtype=np.complex128)
+        matrices[0] = np.eye(2)
+        order = np.argsort(depths, kind='stable')
+        boundaries = np.searchsorted(depths[order], np.arange(1, depths.max() + 2))
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            level = order[start:end]
+            matrices[level] = self.generator_array[letters[level]] @ matrices[parents[level]]
+            if machine_precision:
+                continue
+            policy.evaluations += len(level)
+            if policy.mode == 'adaptive':
+                M = matrices[level]
+                drift = np.abs(np.abs(M[:,0,0]*M[:,1,1] - M[:,0,1]*M[:,1,0]) - 1)
+                policy.max_drift = max(policy.max_drift, float(drift.max()))
+                for node in level[~(drift <= policy.threshold)]:
+                    # Read off the word of the node by walking up to the root, and multiply it out in mpmath.
+                    word = []
+                    ancestor = node
+                    while ancestor > 0:
+                        word.append(letters[ancestor])
+                        ancestor = parents[ancestor]
+                    with policy.workdps():
+                        exact = functools.reduce(lambda M, x: M @ self.generators[x], word[1:], self.generators[word[0]])
+                    matrices[node] = to_complex128(exact)
+                    policy.escalations += 1
+        return matrices[np.array(ends, dtype=np.intp)]
+
     def word_to_fancyword(self, word):
         """ Convert from (1,2,3) words to "abc" words """
         return ''.join([self.names[j] for j in word])
 
     def fancyword_to_word(self, fancyword):
         """ Convert from "abc" words to (1,2,3) words """
-        return tuple( self.names_reverse_lookup[ell] for ell in fancyword )
+        return tuple(self._fancyword_letters(fancyword).tolist())
+
+    def _fancyword_letters(self, fancyword):
+        """ Translate an "abc" word into a NumPy array of generator indices.
+
+            If every name is a single ASCII character the whole string is translated at once through a 256-entry table,
+            otherwise one character at a time through `names_reverse_lookup`. Unknown letters raise a KeyError.
+        """
+        if self.names_reverse_lookup is None:
+            raise KeyError(f"cannot read the word {fancyword!r} since the generators of this group have no names")
+        if self._name_table is not None and isinstance(fancyword, str) and fancyword.isascii():
+            letters = self._name_table[np.frombuffer(fancyword.encode('ascii'), dtype=np.uint8)]
+            if (letters < 0).any():
+                raise KeyError(fancyword[int(np.argmax(letters < 0))])
+            return letters
+        return np.fromiter((self.names_reverse_lookup[ell] for ell in fancyword), dtype=np.intp, count=len(fancyword))
+
+    def evaluate_fancywords(self, fancywords, machine_precision=False):
+        """ Evaluate a batch of "abc" words, e.g. all of the Farey words of a slice.
+
+            Each word is translated once into an array of generator indices. If `machine_precision` is True, the whole
+            batch is then evaluated by `evaluate_words`; otherwise each word is multiplied out by a single fold, as
+            `__getitem__` does for strings, without going through the word cache.
+
+            Returns: a NumPy array of shape (len(fancywords), 2, 2) and dtype complex128 if `machine_precision` is True,
+            otherwise a list of matrices.
+        """
+        words = [self._fancyword_letters(w) for w in fancywords]
+        if machine_precision:
+            return self.evaluate_words(words)
+        return [self._evaluate_letters(letters) for letters in words]
+
+    def _evaluate_letters(self, letters):
+        """ Multiply out a word, given as a sequence of generator indices, by a single fold according to `self.precision`. """
+        if len(letters) == 0:
+            return self._underlying_matrix_t([[1,0],[0,1]])
+
+        policy = self.precision
+        if policy.mode == 'mp':
+            with policy.workdps():
+                return functools.reduce(lambda M, x: M @ self.generators[x], letters[1:], self.generators[letters[0]])
+
+        generators = self.generator_array
+        matrix = functools.reduce(lambda M, x: M @ generators[x], letters[1:], generators[letters[0]])
+        policy.evaluations += len(letters)
+        if policy.mode == 'adaptive':
+            drift = abs(abs(matrix[0,0]*matrix[1,1] - matrix[0,1]*matrix[1,0]) - 1)
+            policy.max_drift = max(policy.max_drift, drift)
+            if not drift <= policy.threshold:
+                policy.escalations += 1
+                with policy.workdps():
+                    matrix = to_complex128(functools.reduce(lambda M, x: M @ self.generators[x], letters[1:], self.generators[letters[0]]))
+        return matrix
+
+    def encode_word(self, word):
+        """ Encode a word as an integer.
+
+            The code of (x_0, x_1, ..., x_k) is the sum of (x_i + 1) * b**i where b = 2n + 1 and n is the number of generators,
+            so the empty word is 0, the first letter of a word is (code % b) - 1, the word with its first letter removed
+            is code // b, and the word (x) + word has code (x + 1) + b * code. The enumerators take `encoded=True`
+            to walk the Cayley graph in this form without building tuples, and `__getitem__` accepts codes directly.
+        """
+        code = 0
+        for letter in reversed(word):
+            code = (letter + 1) + self.word_base*code
+        return code
+
+    def decode_word(self, code):
+        """ Decode an integer produced by `encode_word` back into a tuple. """
+        letters = []
+        while code:
+            code, digit = divmod(int(code), self.word_base)
+            if digit == 0:
+                raise ValueError("not a word code: a digit is zero")
+            letters.append(digit - 1)
+        return tuple(letters)
 
-    @functools.cache
     def __getitem__(self, word):
         """ Given a word in the generators, return the corresponding matrix.
 
             This function can take the following formats:
               - tuples (1,2,3,4,) where indices are indexes into [generators] union [generator inverses]
               - strings "abc" where a, b, c are the letter passed into the names parameter of the constructor
+              - integers, as produced by `encode_word`
 
+            Matrices of words (and of their suffixes) are remembered in the bounded cache `self.cache`, keyed by the
+            words in the form they were given. Strings are translated once and multiplied out by a single fold, and only
+            the whole string is cached. How matrices are computed is decided by `self.precision` (see `PrecisionPolicy`).
         """
 
-        if len(word) == 0:
-            return self._underlying_matrix_t([[1,0],[0,1]])
+        if isinstance(word, tuple):
+            # Find the longest suffix of the word that we already know (the whole word first, which is the usual case).
+            start, matrix = self.cache.first_cached(word, _proper_suffixes)
+            if start == 0:
+                return matrix
+            if len(word) == 0:
+                return self._underlying_matrix_t([[1,0],[0,1]])
+            if matrix is None:
+                start, matrix = len(word), self._underlying_matrix_t([[1,0],[0,1]])
+            return self._multiply_suffixes([(word[n], word[n:]) for n in reversed(range(start))], matrix)
+
+        if isinstance(word, str):
+            matrix = self.cache.get(word)
+            if matrix is None:
+                matrix = self._evaluate_letters(self._fancyword_letters(word))
+                self.cache[word] = matrix
+            return matrix
+
+        if isinstance(word, (int, np.integer)):
+            word = int(word)
+            if word == 0:
+                return self._underlying_matrix_t([[1,0],[0,1]])
+
+            start, matrix = self.cache.first_cached(word, self._code_suffixes)
+            if start == 0:
+                return matrix
+            codes = [word, *self._code_suffixes(word)]
+            if matrix is None:
+                start, matrix = len(codes), self._underlying_matrix_t([[1,0],[0,1]])
+            return self._multiply_suffixes([(code % self.word_base - 1, code) for code in reversed(codes[:start])], matrix)
+
+        return self[tuple(word)]
+
+    def _code_suffixes(self, code):
+        """ Generate the codes of the proper non-empty suffixes of the word with integer code `code`, longest first.
+
+            These are found by dropping the low digits of the code (see `encode_word`).
+        """
+        code //= self.word_base
+        while code:
+            yield code
+            code //= self.word_base
+
+    def _multiply_suffixes(self, pending, matrix):
+        """ Multiply `matrix` on the left by letters in turn, caching each product.
+
+            Here `pending` is a list of pairs (letter, word), where each word is the previous one (the first being
+            the word whose matrix is `matrix`) with `letter` added on the left.
+        """
+        if self.precision.mode == 'mp':
+            with self.precision.workdps():
+                for letter, word in pending:
+                    matrix = self.generators[letter] @ matrix
+                    self.cache[word] = matrix
         else:
-            try:
-                return self.generators[word[0]] @ self[word[1:]]
-            except IndexError:
-                return self[fancyword_to_word(word)]
+            for letter, word in pending:
+                matrix = self._double_product(letter, matrix, word)
+                self.cache[word] = matrix
+        return matrix
+
+    def _double_product(self, letter, matrix, word):
+        """ Multiply the complex128 `matrix` of word[1:] on the left by the generator `letter`, giving the matrix of `word`.
+
+            In 'adaptive' mode, if the determinant of the product has drifted too far, `word` is re-evaluated in mpmath.
+        """
+        policy = self.precision
+        matrix = self.generator_array[letter] @ matrix
+        policy.evaluations += 1
+        if policy.mode == 'adaptive':
+            drift = abs(abs(matrix[0,0]*matrix[1,1] - matrix[0,1]*matrix[1,0]) - 1)
+            policy.max_drift = max(policy.max_drift, drift)
+            if not drift <= policy.threshold:
+                policy.escalations += 1
+                if isinstance(word, int):
+                    word = self.decode_word(word)
+                with policy.workdps():
+                    exact = functools.reduce(lambda M, x: M @ self.generators[x], word[1:], self.generators[word[0]])
+                matrix = to_complex128(exact)
+        return matrix
+
+    def clear_cache(self):
+        """ Forget all cached matrices. """
+        self.cache.clear()
 
     def __len__(self):
         """ Return the number of generators (not including inverses). """
         return self.length
 
-    @functools.cache
     def is_reduced_from_left(self, word):
         """ Return true if a word starts with any known relator."""
-        return not any(word[:len(r)] == r for r in self.relators)
+        return not self.automaton.starts_with_relator(word)
+
+    def _reduced_children(self, word, state, encoded=False):
+        """ Yield pairs ((x) + `word`, state) for the non-left-reducible neighbours of `word`.
+
+            Here `state` is the state of `self.automaton` for `word`, and the state yielded is the state for the new word.
+            If `encoded` is True then `word` and the new words are integer codes (see `encode_word`).
+        """
+        transitions = self.automaton.transitions[state]
+        if encoded:
+            if word == 0:
+                yield from ((x + 1, transitions[x]) for x in range(2*self.length))
+            else:
+                base = self.word_base
+                accepting = self.automaton.accepting
+                for x in range(2*self.length):
+                    if not accepting[transitions[x]]:
+                        yield ((x + 1) + base*word, transitions[x])
+        elif word == ():
+            yield from (((x,), transitions[x]) for x in range(2*self.length))
+        else:
+            accepting = self.automaton.accepting
+            for x in range(2*self.length):
+                if not accepting[transitions[x]]:
+                    yield ((x,) + word, transitions[x])
 
     def free_random_walk_locally(self, word, rtl=True):
         """ Given a word, produce a single neighbouring longer word randomly.
@@ -150,15 +800,7 @@ class GroupCache:
             for x some generator of the group, such that the new word does not
             start with any known relator.
         """
-        if word == ():
-            return random.choice([(w,) for w in range(2*self.length)])
-        else:
-            words = []
-            for x in range(2*self.length):
-                w = (x,) + word
-                if self.is_reduced_from_left(w):
-                    words.append(w)
-            return random.choice(words)
+        return random.choice([w for w, _ in self._reduced_children(word, self.automaton.state(word))])
 
     def free_cayley_graph_locally(self, word, rtl=True):
         """ Given a word, produce all neighbouring longer words.
@@ -189,22 +831,35 @@ class GroupCache:
             for x some generator of the group, such that the new word is not
             left-reducible/does not start with any known relator.
         """
-        if word == ():
-            yield from [(w,) for w in range(2*self.length)]
-        else:
-            for lab in range(2*self.length):
-                lword = (lab,) + word
-                if self.is_reduced_from_left(lword):
-                    yield lword
+        for w, _ in self._reduced_children(word, self.automaton.state(word)):
+            yield w
 
-    def free_cayley_graph_bfs(self, depth):
+    def free_cayley_graph_bfs(self, depth, encoded=False):
         """ Breadth-first search for all words in the generators, assuming no relators.
 
             Walk the Cayley graph of the free group on the given generators, yielding
             words in a breadth-first way, producing all words of length at most `depth`.
             If the group is not free, this process will produce the group elements
             multiple times, labelled by different words differing by relators.
+
+            If `encoded` is True then the words are yielded as integer codes (see `encode_word`).
         """
+        if encoded:
+            base = self.word_base
+            inverse = self.gen_to_inv
+            last_list = [0]
+            for n in range(depth):
+                this_list = []
+                for code in last_list:
+                    banned = inverse[code % base - 1] if code else None
+                    for lab in range(2*self.length):
+                        if lab != banned:
+                            item = (lab + 1) + base*code
+                            yield item
+                            this_list.append(item)
+                last_list = this_list
+            return
+
         last_list = [()]
         for n in range(depth):
             this_list = []
@@ -214,28 +869,52 @@ class GroupCache:
                     this_list.append(item)
             last_list = this_list
 
-    def free_cayley_graph_dfs(self, depth):
+    def free_cayley_graph_dfs(self, depth, rtl=False, prune=None, encoded=False):
         """ Depth-first search for all words in the generators, assuming no relators.
 
             Walk the Cayley graph of the free group on the given generators, yielding
-            words in a depth-first way, eventually producing all words of length at most `depth`.
+            words in a depth-first way, eventually producing all non-empty words of length at most `depth`.
             If the group is not free, this process will produce the group elements
             multiple times, labelled by different words differing by relators.
-        """
-        discovered = []
-        search_space = []
-
-        search_space.append(tuple())
 
-        while len(search_space) != 0:
-            v = search_space.pop()
-            if not v in discovered:
-                discovered.append(v)
-                if len(v) < depth:
-                    search_space += self.free_cayley_graph_locally(v, rtl=False)
-        return discovered
+            Since the words form a tree, this is a lazy generator with an explicit stack: it keeps only the
+            current path and one iterator per level. Letters are added on the right, or on the left if `rtl = True`.
+            If `prune` is given, it is called on each word of length less than `depth` as it is yielded (the words of
+            length `depth` have nothing below them to skip) and if it returns True then the words below that one are skipped. If `encoded` is True then the words are integer codes (see `encode_word`).
+        """
+        order = range(2*self.length - 1, -1, -1)
+        inverse = self.gen_to_inv
+        base = self.word_base
+        path = []
+        codes = [0] # codes[k] is the code of the word made from path[:k]
+        stack = [iter(order)] if depth >= 1 else []
+
+        while stack:
+            lab = next(stack[-1], None)
+            if lab is None:
+                stack.pop()
+                if path:
+                    path.pop()
+                    codes.pop()
+                continue
+            if path and lab == inverse[path[-1]]:
+                continue
+
+            path.append(lab)
+            if encoded:
+                codes.append((lab + 1) + base*codes[-1] if rtl else codes[-1] + (lab + 1)*base**(len(path) - 1))
+                word = codes[-1]
+            else:
+                codes.append(None)
+                word = tuple(reversed(path)) if rtl else tuple(path)
+            yield word
+            if len(path) < depth and not (prune is not None and prune(word)):
+                stack.append(iter(order))
+            else:
+                path.pop()
+                codes.pop()
 
-    def free_cayley_graph_mc(self, depth, count, rtl=True):
+    def free_cayley_graph_mc(self, depth, count, rtl=True, encoded=False):
         """ Monte-Carlo search for all words in the generators, assuming no relators.
 
             Perform `count` random walks on the Cayley graph of the free group on the given generators,
@@ -244,7 +923,25 @@ class GroupCache:
 
             If the group is not free, this process will produce the group elements
             multiple times, labelled by different words differing by relators.
+
+            If `encoded` is True then the words are yielded as integer codes (see `encode_word`).
         """
+        if encoded:
+            base = self.word_base
+            inverse = self.gen_to_inv
+            for nn in range(count):
+                code = 0
+                end = None # the letter at the growing end of the word
+                for n in range(depth):
+                    if end is None:
+                        end = random.randrange(2*self.length)
+                    else:
+                        choice = random.randrange(2*self.length - 1)
+                        end = choice + (choice >= inverse[end])
+                    code = (end + 1) + base*code if rtl else code + (end + 1)*base**n
+                    yield code
+            return
+
         for nn in range(count):
             # print(f"{nn/count:2.2%}")
             word = ()
@@ -252,24 +949,101 @@ class GroupCache:
                 word = self.free_random_walk_locally(word, rtl)
                 yield word
 
-    def cayley_graph_bfs(self, depth):
+    def cayley_graph_bfs(self, depth, encoded=False):
         """ Breadth-first search for all words in the generators, assuming no relators.
 
             Walk the Cayley graph of the free group on the given generators, yielding
             words in a breadth-first way, producing all words of length at most `depth`.
             At each step the walk will append a generator to the left of the word
             such that the resulting word is non-left-reducible of incrementally longer length.
+
+            If `encoded` is True then the words are yielded as integer codes (see `encode_word`).
         """
-        last_list = [()]
+        last_list = [(0 if encoded else (), self.automaton.start)]
         for n in range(depth):
             this_list = []
-            for w in last_list:
-                for item in self.cayley_graph_locally(w):
-                    yield item
+            for w, state in last_list:
+                for item in self._reduced_children(w, state, encoded):
+                    yield item[0]
                     this_list.append(item)
             last_list = this_list
 
-    def cayley_graph_mc(self, depth, count, yield_shorter=True):
+    def _bfs_levels(self, depth, free, machine_precision):
+        """ Walk a Cayley graph level by level, carrying the matrix of each word along with it.
+
+            Each child (x) + `word` is evaluated as (generator x) @ (matrix of `word`), using the matrices
+            of the previous level, so no global cache is needed. If `free` is False then only non-left-reducible
+            words are walked, using the relator automaton.
+
+            Yields: pairs (words, matrices), one for each level 1, ..., `depth`. If `machine_precision` is True then
+            matrices is a NumPy array of shape (len(words), 2, 2) and dtype complex128, otherwise it is a list of matrices
+            of the same type as `self[word]` would return, computed as `self.precision` says (see `PrecisionPolicy`).
+        """
+        last_words = [()]
+        last_states = [self.automaton.start]
+        if machine_precision:
+            last_matrices = np.eye(2, dtype=np.complex128)[np.newaxis]
+        else:
+            last_matrices = [self._underlying_matrix_t([[1,0],[0,1]])]
+
+        for n in range(depth):
+            words = []
+            states = []
+            parents = []
+            for parent, (w, state) in enumerate(zip(last_words, last_states)):
+                children = ((item, None) for item in self.free_cayley_graph_locally(w)) if free else self._reduced_children(w, state)
+                for item, item_state in children:
+                    words.append(item)
+                    states.append(item_state)
+                    parents.append(parent)
+
+            if machine_precision:
+                letters = np.fromiter((w[0] for w in words), dtype=np.intp, count=len(words))
+                matrices = self.generator_array[letters] @ last_matrices[np.array(parents, dtype=np.intp)]
+            elif self.precision.mode == 'mp':
+                with self.precision.workdps():
+                    matrices = [self.generators[w[0]] @ last_matrices[parent] for w, parent in zip(words, parents)]
+            else:
+                matrices = [self._double_product(w[0], last_matrices[parent], w) for w, parent in zip(words, parents)]
+
+            yield (words, matrices)
+            last_words = words
+            last_states = states
+            last_matrices = matrices
+
+    def free_cayley_graph_bfs_levels(self, depth, machine_precision=False):
+        """ Breadth-first search for all words in the generators together with their matrices, assuming no relators.
+
+            This walks the same words as `free_cayley_graph_bfs(depth)`, but each level is produced in one go and each
+            word comes with its matrix, computed with one product from the matrix of its parent.
+
+            Yields: pairs (words, matrices), one for each level 1, ..., `depth`. If `machine_precision` is True then
+            matrices is a NumPy array of shape (len(words), 2, 2) and dtype complex128, otherwise it is a list of matrices.
+        """
+        yield from self._bfs_levels(depth, True, machine_precision)
+
+    def cayley_graph_bfs_levels(self, depth, machine_precision=False):
+        """ Breadth-first search for all non-left-reducible words in the generators together with their matrices.
+
+            This walks the same words as `cayley_graph_bfs(depth)`, but each level is produced in one go and each
+            word comes with its matrix, computed with one product from the matrix of its parent.
+
+            Yields: pairs (words, matrices), one for each level 1, ..., `depth`. If `machine_precision` is True then
+            matrices is a NumPy array of shape (len(words), 2, 2) and dtype complex128, otherwise it is a list of matrices.
+        """
+        yield from self._bfs_levels(depth, False, machine_precision)
+
+    def free_cayley_graph_bfs_matrices(self, depth, machine_precision=False):
+        """ Breadth-first search yielding pairs (word, matrix); see `free_cayley_graph_bfs_levels`. """
+        for words, matrices in self.free_cayley_graph_bfs_levels(depth, machine_precision):
+            yield from zip(words, matrices)
+
+    def cayley_graph_bfs_matrices(self, depth, machine_precision=False):
+        """ Breadth-first search yielding pairs (word, matrix); see `cayley_graph_bfs_levels`. """
+        for words, matrices in self.cayley_graph_bfs_levels(depth, machine_precision):
+            yield from zip(words, matrices)
+
+    def cayley_graph_mc(self, depth, count, yield_shorter=True, encoded=False):
         """ Monte-Carlo search for all words in the generators
 
             Perform `count` random walks on the Cayley graph of the group,
@@ -278,16 +1052,18 @@ class GroupCache:
             to the left of the word such that the resulting word is non-left-reducible of incrementally longer length.
 
             If `yield_shorter` is True then return all words that are seen during the walk; if `yield_shorter` is False
-            then only return words of length = depth.
+            then only return words of length = depth. If `encoded` is True then the words are yielded as integer codes
+            (see `encode_word`).
         """
         for nn in range(count):
-            word = ()
+            word = 0 if encoded else ()
+            state = self.automaton.start
             for n in range(depth):
-                word = self.random_walk_locally(word)
-                if yield_shorter or n == depth:
+                word, state = random.choice(list(self._reduced_children(word, state, encoded)))
+                if yield_shorter or n == depth - 1:
                     yield word
 
-    def coloured_limit_set_mc(self, depth, count, seed = 0, complexify=complex, rtl=True):
+    def coloured_limit_set_mc(self, depth, count, seed = 0, complexify=complex, rtl=True, chunk_size=None):
         """ Monte-carlo search for points in the limit set.
 
             Produce `depth`*`count` translates of the element `seed`, thus approximating the limit set,
@@ -295,6 +1071,7 @@ class GroupCache:
 
             Generates: a dataframe with columns [ x, y, colour ] where x+yi is a point in the limit set
             and colour is the index of the first element in the word indexing that limit set.
+            If `chunk_size` is not None, instead return an iterator over column-oriented chunks (see `chunk_rows`).
         """
         warnings.warn("cayley.coloured_limit_set_mc() is deprecated from v0.1.3. Prefer coloured_limit_set_fast().")
         if seed == mp.inf:
@@ -309,17 +1086,45 @@ class GroupCache:
                     cpx = complexify(point[0,0]/point[1,0])
                     yield (cpx.real, cpx.imag, w[0])
 
+        if chunk_size is not None:
+            return chunk_rows(_internal_generator(), chunk_size)
         return pd.DataFrame(_internal_generator(), columns=['x','y','colour'])
 
-    def coloured_limit_set_fast(self, count, seed=None, rebase_when=None, complexify=complex):
+    def coloured_limit_set_fast(self, count, seed=None, rebase_when=None, complexify=complex, chunk_size=None, walkers=None, random_state=None,
+                                renormalise_every=64, return_stats=False):
         """ Monte-carlo search for points in the limit set.
 
             Produce `count` translates of the element `seed`, thus approximating the limit set,
-            by doing a random walk.
+            by doing a random walk. The homogeneous base vector is scaled to have largest entry 1 every
+            `renormalise_every` steps (never, if it is None or 0), so that long walks stay within range; if `rebase_when`
+            is not None then the walk is restarted from (a new) seed whenever it reaches a point further than `rebase_when` from 0.
+
+            If `walkers` is not None, then instead `walkers` independent random walks are advanced together
+            in complex128 arithmetic (see `_walker_chunks`); the letters are drawn from the NumPy random generator
+            `np.random.default_rng(random_state)`, and `complexify` and `renormalise_every` are ignored (the base vectors
+            are renormalised at every step, which costs little when it is done in one batch).
 
             Generates: a dataframe with columns [ x, y, colour ] where x+yi is a point in the limit set
             and colour is the index of the first element in the word indexing that limit set.
+            If `chunk_size` is not None, instead return an iterator over column-oriented chunks (see `chunk_rows`).
+            If `return_stats` is True, return a pair (points, stats) where stats is a dictionary counting
+            'renormalisations', 'rebases', and 'nonfinite' points (which are not returned), and giving 'generator_det_error',
+            the largest ||det g| - 1| over the generators g (a check that the walk is by Möbius maps of determinant ±1, as the
+            base vector alone carries no record of drift). When chunks are returned, the counters are filled in as they are consumed.
         """
+        if renormalise_every is not None and (not isinstance(renormalise_every, (int, np.integer)) or renormalise_every < 0):
+            raise ValueError(f"renormalise_every must be None or a non-negative integer, not {renormalise_every!r}")
+
+        stats = { 'renormalisations': 0, 'rebases': 0, 'nonfinite': 0,
+                  'generator_det_error': max(float(abs(abs(simple_det(g)) - 1)) for g in self.generators) }
+
+        if walkers is not None:
+            chunks = self._walker_chunks(count, walkers, seed, rebase_when, np.random.default_rng(random_state), stats)
+            if chunk_size is not None:
+                points = rechunk(chunks, chunk_size)
+            else:
+                points = chunks_to_dataframe(chunks)
+            return (points, stats) if return_stats else points
 
         def reseed(seed):
             if seed == None:
@@ -335,20 +1140,246 @@ class GroupCache:
 
         def _internal_generator(base):
             last = next(self.free_cayley_graph_mc(1,1))
-            for _ in range(count):
+            for step in range(1, count + 1):
                 base = self[last] @ base
-                if base[1] != 0:
+                if base[1,0] != 0:
                     cpx = complexify(base[0,0]/base[1,0])
-                    yield (cpx.real, cpx.imag, last[0])
-                if (rebase_when != None) and (mp.fabs(cpx) > rebase_when):
+                    if cmath.isfinite(cpx) if isinstance(cpx, complex) else (mp.isfinite(cpx.real) and mp.isfinite(cpx.imag)):
+                        yield (cpx.real, cpx.imag, last[0])
+                    else:
+                        stats['nonfinite'] += 1
+                else:
+                    cpx = mp.inf
+                    stats['nonfinite'] += 1
+
+                if (rebase_when != None) and not (abs(cpx) <= rebase_when):
                     base = reseed(seed)
-                    print(f"rebasing")
+                    stats['rebases'] += 1
+                elif renormalise_every and step % renormalise_every == 0:
+                    scale = max(abs(base[0,0]), abs(base[1,0]))
+                    if scale != 0:
+                        base = base/scale
+                        stats['renormalisations'] += 1
                 last = self.free_random_walk_locally(last)[:1]
 
-        return pd.DataFrame(_internal_generator(base), columns=['x','y','colour'])
+        if chunk_size is not None:
+            points = chunk_rows(_internal_generator(base), chunk_size)
+        else:
+            points = pd.DataFrame(_internal_generator(base), columns=['x','y','colour'])
+        return (points, stats) if return_stats else points
+
+    def _walker_chunks(self, count, walkers, seed, rebase_when, rng, stats=None):
+        """ Advance `walkers` independent random walks on the limit set at once, producing `count` points in total.
+
+            Each walker carries a homogeneous base vector and its last letter. At every step all of the base vectors are
+            moved by the generator matrices of their last letters with one batched product, and then each walker picks
+            a new letter uniformly from the 2n-1 letters which are not the inverse of its last letter. Base vectors are
+            rescaled at each step so that long walks stay within double range.
+
+            If `stats` is a dictionary as in `coloured_limit_set_fast`, its counters are updated as the walk goes.
+
+            Yields: a column-oriented chunk (see `chunk_rows`) of at most `walkers` points for each step.
+        """
+        generators = self.generator_array
+        inverse = np.array(self.gen_to_inv, dtype=np.intp)
+        letter_count = 2*self.length
+
+        def initial_vectors(number):
+            if seed is None:
+                # Fixed points of random reduced words of length 2, as in the single walker case.
+                firsts = rng.integers(0, letter_count, size=number)
+                seconds = rng.integers(0, letter_count - 1, size=number)
+                seconds += (seconds >= inverse[firsts])
+                seeds = mobius_fixed_points_array(generators[seconds] @ generators[firsts])[:,0]
+            else:
+                seeds = np.full(number, np.inf if seed == mp.inf else complex(seed), dtype=np.complex128)
+            at_infinity = np.isinf(seeds)
+            return np.stack([np.where(at_infinity, 1, seeds), np.where(at_infinity, 0, 1)], axis=1).astype(np.complex128)
+
+        vectors = initial_vectors(walkers)
+        last = rng.integers(0, letter_count, size=walkers)
+
+        remaining = count
+        while remaining > 0:
+            if remaining < walkers:
+                vectors, last = vectors[:remaining], last[:remaining]
+            vectors = (generators[last] @ vectors[:,:,np.newaxis])[:,:,0]
+            vectors /= np.abs(vectors).max(axis=1, keepdims=True)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                points = vectors[:,0]/vectors[:,1]
+            valid = np.isfinite(points)
+            if stats is not None:
+                stats['renormalisations'] += len(last)
+                stats['nonfinite'] += int(len(last) - valid.sum())
+            yield {'x': points.real[valid], 'y': points.imag[valid], 'colour': last[valid]}
+            remaining -= len(last)
+
+            if rebase_when is not None:
+                rebase = ~valid | (np.abs(points) > rebase_when)
+                if rebase.any():
+                    vectors[rebase] = initial_vectors(int(rebase.sum()))
+                    if stats is not None:
+                        stats['rebases'] += int(rebase.sum())
+
+            # Choose uniformly from the letters other than the inverse of the last letter.
+            choice = rng.integers(0, letter_count - 1, size=len(last))
+            last = choice + (choice >= inverse[last])
+
+    def limit_set_raster(self, count, extent, resolution, by_colour=False, walkers=1000, seed=None, rebase_when=None,
+                         random_state=None, processes=None, **kwargs):
+        """ Monte-carlo search for the limit set, accumulated straight into a raster of hit counts.
+
+            The `count` points are produced by `walkers` random walks (see `coloured_limit_set_fast`) and counted into a
+            preallocated integer array as they are made, so no list of points is ever built and the memory used is
+            proportional to the number of pixels. If `processes` is not None then the work is shared out as in
+            `parallel_limit_set` (which also receives any other keyword arguments) and the rasters are summed.
+
+            Arguments:
+            extent -- (xmin, xmax, ymin, ymax), the region of the plane to draw.
+            resolution -- (width, height) in pixels, or a single integer for a square raster.
+            by_colour -- if True, keep one raster for each generator, counting points by their colour.
+
+            Returns: (raster, extent), where raster is an int64 array of shape (height, width) or, if `by_colour`,
+            (2 * number of generators, height, width), in image orientation (see `accumulate_raster`). For example,
+            hv.Image(raster, bounds=(xmin, ymin, xmax, ymax)) draws it.
+        """
+        width, height = (resolution, resolution) if np.isscalar(resolution) else resolution
+        extent = tuple(float(e) for e in extent)
+        shape = (2*self.length, height, width) if by_colour else (height, width)
+
+        if processes is not None:
+            rasters = self.parallel_limit_set(count, processes=processes, walkers=walkers, seed=seed, rebase_when=rebase_when,
+                                              random_state=random_state, raster=(extent, shape), **kwargs)
+            return (sum(rasters, np.zeros(shape, dtype=np.int64)), extent)
+
+        raster = np.zeros(shape, dtype=np.int64)
+        for chunk in self._walker_chunks(count, walkers, seed, rebase_when, np.random.default_rng(random_state)):
+            accumulate_raster(raster, chunk, extent)
+        return (raster, extent)
+
+    def serialise_generators(self, dps=None):
+        """ Return the generators (not including inverses) in a portable form that can be pickled.
+
+            Each generator becomes a 2x2 nested list of pairs of decimal strings (real part, imaginary part),
+            written to `dps` significant digits (by default, the current mp.dps). Use `deserialise_generators`
+            to rebuild mp.matrix objects from the result.
+        """
+        dps = mp.dps if dps is None else dps
+        def entry(z):
+            z = mp.mpc(z)
+            return (mp.nstr(z.real, dps), mp.nstr(z.imag, dps))
+        return [[[entry(g[i,j]) for j in range(2)] for i in range(2)] for g in self.generators[:self.length]]
+
+    def parallel_limit_set(self, count, processes=None, tasks=None, walkers=1000, seed=None, rebase_when=None,
+                           random_state=None, chunk_size=None, dps=None, start_method='spawn', raster=None):
+        """ Monte-carlo search for points in the limit set, spread across several processes.
+
+            mpmath objects cannot be pickled, so the generators are sent to the workers as decimal strings with `dps`
+            digits (see `serialise_generators`) and each worker rebuilds the group itself. The `count` points are split
+            into `tasks` tasks (by default 4 per process) and each task runs `coloured_limit_set_fast(..., walkers=walkers)`
+            with its own independent random stream, spawned from `np.random.SeedSequence(random_state)`. Results are
+            merged as the tasks finish, so only a few tasks worth of points are held in memory at once.
+
+            This works with the `spawn` start method (the default here), but then the calling script needs the usual
+            `if __name__ == '__main__':` guard.
+
+            Generates: a dataframe with columns [ x, y, colour ] as for `coloured_limit_set_fast`, or if `chunk_size`
+            is not None, an iterator over column-oriented chunks (see `chunk_rows`). If `raster` is a pair (extent, shape)
+            then each task instead accumulates its points into a raster of that shape (see `accumulate_raster`) and an
+            iterator over these rasters is returned; `limit_set_raster` uses this.
+        """
+        processes = os.cpu_count() if processes is None else processes
+        tasks = 4*processes if tasks is None else tasks
+        dps = mp.dps if dps is None else dps
+
+        generators = self.serialise_generators(dps)
+        seed = None if seed is None else ('inf' if seed == mp.inf else (mp.nstr(mp.mpc(seed).real, dps), mp.nstr(mp.mpc(seed).imag, dps)))
+        streams = np.random.SeedSequence(random_state).spawn(tasks)
+        counts = [count//tasks + (1 if n < count % tasks else 0) for n in range(tasks)]
+        arguments = [(generators, dps, task_count, walkers, seed, rebase_when, stream, raster) for task_count, stream in zip(counts, streams) if task_count > 0]
+
+        def _internal_generator():
+            with multiprocessing.get_context(start_method).Pool(processes) as pool:
+                yield from pool.imap_unordered(_parallel_limit_set_task, arguments)
+
+        if raster is not None:
+            return _internal_generator()
+        if chunk_size is not None:
+            return rechunk(_internal_generator(), chunk_size)
+        return chunks_to_dataframe(_internal_generator())
+
+    def limit_set_adaptive(self, epsilon, max_depth=30, segments=False, machine_precision=True):
+        """ Adaptive depth-first search for points on the limit set, in the style of Indra's Pearls (Chapter 7).
+
+            Words are built by adding letters on the right, and the children of a word ending in the letter x are visited
+            in the cyclic order inv(x)+1, inv(x)+2, ..., inv(x)-1 (mod 2n), so that consecutive leaves of the search are
+            adjacent on the limit set. The limit points below a word T ending in x lie on an arc running from T(p_x) through
+            T(q_x) to T(r_x), where q_x is the attracting fixed point of x and p_x, r_x are the attracting fixed points of
+            the infinite words which keep taking the first (resp. last) child, i.e. of cyclic commutator-like words.
+            A branch is cut off once consecutive points of its arc are closer than `epsilon`, or at depth `max_depth`,
+            so the output has roughly uniform detail however fast the different branches shrink.
+
+            The matrix of each word is computed from its parent with one product; if `machine_precision` is True this is
+            done in Python complex arithmetic, otherwise using the matrices of the generators.
+
+            Generates: a dataframe with columns [ x, y, colour ] listing the points T(p_x), T(q_x), T(r_x) of each leaf in
+            order along the limit set (suitable for hv.Path), where colour is the first letter of the word; or, if `segments`
+            is True, a dataframe with columns [ x0, y0, x1, y1, colour ] of the line segments joining these points.
+            Points at infinity are left out.
+        """
+        letter_count = 2*self.length
+        inverse = self.gen_to_inv
+        convert = complex if machine_precision else (lambda z: z)
+        generators = [tuple(convert(g[i,j]) for i in range(2) for j in range(2)) for g in self.generators]
 
+        def multiply(S, T):
+            return (S[0]*T[0] + S[1]*T[2], S[0]*T[1] + S[1]*T[3], S[2]*T[0] + S[3]*T[2], S[2]*T[1] + S[3]*T[3])
 
-    def limit_set_dfs(self, depth, seed = 0, complexify=complex):
+        def act(T, z):
+            if z == mp.inf:
+                numerator, denominator = T[0], T[2]
+            else:
+                numerator, denominator = T[0]*z + T[1], T[2]*z + T[3]
+            return mp.inf if denominator == 0 else numerator/denominator
+
+        def cycle_point(x, step):
+            # Attracting fixed point of the infinite word x, step(x), step(step(x)), ... (step is a permutation, so this is periodic)
+            word = [x]
+            while step(word[-1]) != x:
+                word.append(step(word[-1]))
+            z = mobius_attracting_fixed_point(self[tuple(word)])
+            return z if z == mp.inf else convert(z)
+
+        first_child = lambda x: (inverse[x] + 1) % letter_count
+        last_child = lambda x: (inverse[x] - 1) % letter_count
+        arcs = [(cycle_point(x, first_child), cycle_point(x, lambda y: y), cycle_point(x, last_child)) for x in range(letter_count)]
+
+        def close(points):
+            return all(z != mp.inf and w != mp.inf and abs(z - w) < epsilon for z, w in zip(points, points[1:]))
+
+        def _internal_generator():
+            stack = [(generators[x], x, x, 1) for x in reversed(range(letter_count))]
+            while stack:
+                T, last, colour, depth = stack.pop()
+                points = [act(T, z) for z in arcs[last]]
+                if depth >= max_depth or close(points):
+                    points = [complex(z) for z in points if z != mp.inf]
+                    if segments:
+                        for z, w in zip(points, points[1:]):
+                            yield (z.real, z.imag, w.real, w.imag, colour)
+                    else:
+                        for z in points:
+                            yield (z.real, z.imag, colour)
+                else:
+                    for k in reversed(range(1, letter_count)):
+                        x = (inverse[last] + k) % letter_count
+                        stack.append((multiply(T, generators[x]), x, colour, depth + 1))
+
+        columns = ['x0','y0','x1','y1','colour'] if segments else ['x','y','colour']
+        return pd.DataFrame(_internal_generator(), columns=columns)
+
+    def limit_set_dfs(self, depth, seed = 0, complexify=complex, chunk_size=None):
         """ Depth-first ordered search for points in the limit set.
 
             Produce all translates of the element `seed` up to depth `depth` in the Cayley
@@ -356,6 +1387,7 @@ class GroupCache:
             by `free_cayley_graph_dfs(depth)`.
 
             Generates: a dataframe with columns [ x, y ] where x+yi is a point in the limit set.
+            If `chunk_size` is not None, instead return an iterator over column-oriented chunks (see `chunk_rows`).
         """
         if seed == mp.inf:
             base = self._underlying_matrix_t([[1],[0]])
@@ -369,29 +1401,55 @@ class GroupCache:
                     cpx = complexify(point[0,0]/point[1,0])
                     yield (cpx.real, cpx.imag, w[0])
 
+        if chunk_size is not None:
+            return chunk_rows(_internal_generator(), chunk_size)
         return pd.DataFrame(_internal_generator(), columns=['x','y','colour'])
 
-    def limit_set_bfs(self, depth, seed = 0, complexify=complex):
+    def limit_set_bfs(self, depth, seed = 0, complexify=complex, machine_precision=False, chunk_size=None):
         """ Breadth-first ordered search for points in the limit set.
 
             Produce all translates of the element `seed` up to depth `depth` in the Cayley
             graph, thus approximating the limit set, by computing the Cayley graph as returned
-            by `free_cayley_graph_bfs(depth)`.
+            by `free_cayley_graph_bfs_levels(depth, machine_precision)`.
+
+            If `machine_precision` is True then each level is computed in complex128 arithmetic
+            all at once, and `complexify` is ignored.
 
             Generates: a dataframe with columns [ x, y ] where x+yi is a point in the limit set.
+            If `chunk_size` is not None, instead return an iterator over column-oriented chunks (see `chunk_rows`).
         """
+        if machine_precision:
+            def _internal_generator():
+                for words, matrices in self.free_cayley_graph_bfs_levels(depth, True):
+                    if seed == mp.inf:
+                        numerators, denominators = matrices[:,0,0], matrices[:,1,0]
+                    else:
+                        seed_cpx = complex(seed)
+                        numerators = matrices[:,0,0]*seed_cpx + matrices[:,0,1]
+                        denominators = matrices[:,1,0]*seed_cpx + matrices[:,1,1]
+                    finite = denominators != 0
+                    points = numerators[finite]/denominators[finite]
+                    colours = np.fromiter((w[0] for w in words), dtype=int, count=len(words))[finite]
+                    yield {'x': points.real, 'y': points.imag, 'colour': colours}
+
+            if chunk_size is not None:
+                return rechunk(_internal_generator(), chunk_size)
+            return chunks_to_dataframe(_internal_generator())
+
         if seed == mp.inf:
             base = self._underlying_matrix_t([[1],[0]])
         else:
             base = self._underlying_matrix_t([[seed],[1]])
 
         def _internal_generator():
-            for w in self.free_cayley_graph_bfs(depth):
-                point = self[w] @ base
+            for w, m in self.free_cayley_graph_bfs_matrices(depth):
+                point = m @ base
                 if point[1] != 0:
                     cpx = complexify(point[0,0]/point[1,0])
                     yield (cpx.real, cpx.imag, w[0])
 
+        if chunk_size is not None:
+            return chunk_rows(_internal_generator(), chunk_size)
         return pd.DataFrame(_internal_generator(), columns=['x','y','colour'])
 
     def isometric_circle(self, word):
@@ -399,12 +1457,7 @@ class GroupCache:
 
             Returns: (centre, radius) where centre is complex and radius is real.
         """
-        m = self[word]
-        if m[1,0] == 0:
-            return (mp.inf,mp.inf)
-        centre = -m[1,1]/m[1,0]
-        radius = mp.fabs(1/m[1,0])
-        return (centre, radius)
+        return mobius_isometric_circle(self[word])
 
     def coloured_isometric_circles_mc(self, depth, count, min_radius=0, bounding_radius=10000):
         """ Monte-carlo search for isometric circles in the limit set.
@@ -430,7 +1483,7 @@ class GroupCache:
 
         return pd.DataFrame.from_records(_internal_generator(), columns=['x','y','radius','colour'])
 
-    def coloured_isometric_circles_bfs(self, depth, min_radius=0, bounding_radius=10000):
+    def coloured_isometric_circles_bfs(self, depth, min_radius=0, bounding_radius=10000, machine_precision=False, prune=False):
         """ Breadth-first search for isometric circles in the limit set.
 
             Returns a dataframe with columns [ x, y, radius, colour ] where (x,y) is the centre
@@ -438,11 +1491,17 @@ class GroupCache:
             the generator indexed by `colour`.
 
             Exclude circles with radius < min_radius, or with |centre| > bounding_radius.
+
+            If `machine_precision` is True then the circles are computed a level at a time by `isometric_circle_arrays`,
+            which can also `prune` the search below circles of radius < min_radius.
         """
 
+        if machine_precision:
+            return pd.DataFrame(self.isometric_circle_arrays(depth, min_radius, bounding_radius, prune))
+
         def _internal_generator():
-            for w in self.cayley_graph_bfs(depth):
-                centre, radius = self.isometric_circle(w)
+            for w, m in self.cayley_graph_bfs_matrices(depth):
+                centre, radius = mobius_isometric_circle(m)
                 if centre == mp.inf:
                     continue
                 if (radius < min_radius) or (mp.fabs(centre) > bounding_radius):
@@ -451,6 +1510,119 @@ class GroupCache:
 
         return pd.DataFrame.from_records(_internal_generator(), columns=['x','y','radius','colour'])
 
+    def isometric_circle_arrays(self, depth, min_radius=0, bounding_radius=10000, prune=True):
+        """ Breadth-first search for isometric circles, vectorised over each level of the Cayley graph.
+
+            This walks the same non-left-reducible words as `cayley_graph_bfs(depth)`, but a whole level is handled at
+            once in complex128 arithmetic: the matrices of the level are one batched product from those of the previous
+            level, the relator automaton is advanced by indexing its transition table, and the centres -d/c and radii 1/|c|
+            come straight from the bottom rows. No word tuples are built.
+
+            Since letters are added on the left, for Schottky-like groups the isometric circle of a word is nested inside the
+            isometric circle of its parent; so if `prune` is True, the words below a circle of radius < `min_radius`
+            are not visited at all.
+
+            Returns: a dictionary with keys 'x', 'y', 'radius', 'colour' of NumPy arrays, containing the circles of radius
+            at least `min_radius` with |centre| <= `bounding_radius`, where colour is the first letter of the word.
+        """
+        matrices = np.eye(2, dtype=np.complex128)[np.newaxis]
+        states = np.array([self.automaton.start], dtype=np.intp)
+        results = []
+
+        for n in range(depth):
+            parents, letters, states = self._next_level_arrays(states, n == 0)
+            matrices = self.generator_array[letters] @ matrices[parents]
+
+            c = matrices[:,1,0]
+            finite = c != 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                centres = -matrices[:,1,1]/c
+                radii = 1/np.abs(c)
+            keep = finite & (radii >= min_radius) & (np.abs(centres) <= bounding_radius)
+            results.append({'x': centres.real[keep], 'y': centres.imag[keep], 'radius': radii[keep], 'colour': letters[keep]})
+
+            if prune:
+                expand = ~finite | (radii >= min_radius)
+                matrices, states = matrices[expand], states[expand]
+
+        if not results:
+            return {'x': np.empty(0), 'y': np.empty(0), 'radius': np.empty(0), 'colour': np.empty(0, dtype=np.intp)}
+        return { column: np.concatenate([r[column] for r in results]) for column in ('x','y','radius','colour') }
+
+    def _next_level_arrays(self, states, first):
+        """ Advance one level of the vectorised breadth-first search over non-left-reducible words.
+
+            Given the automaton states of the words on one level, return (parents, letters, states): for each child
+            word, the index of its parent, the letter added on the left, and its automaton state.
+        """
+        child_states = self.automaton.transition_array[states]
+        valid = np.ones_like(child_states, dtype=bool) if first else ~self.automaton.accepting_array[child_states]
+        parents, letters = np.nonzero(valid)
+        return (parents, letters, child_states[parents, letters])
+
+    def circle_orbit_arrays(self, circles, depth, min_radius=0, tol=1e-9):
+        """ Breadth-first search for the images of some seed circles under the group, vectorised as `isometric_circle_arrays`.
+
+            Each level of non-left-reducible words is built as one batched product, and all of the seed circles are
+            mapped by all of the words of the level at once with `map_circles_array`. The words below a word whose images
+            of the seeds all have radius < `min_radius` are not visited. Images which are lines are dropped. A circle whose
+            centre is within distance `tol` of the centre of an earlier kept circle, and whose radius is within `tol` of
+            its radius, is a duplicate and is dropped (so the shortest word is kept); the close pairs are found with a
+            `spatial.CircleIndex` over the centres, so no coordinates are rounded and huge circles are compared correctly.
+
+            Arguments:
+            circles -- the seed circles, as a list of points of circle space (see `circle_in_circle_space`) or
+                       an array of shape (N, 4).
+            depth -- the maximum word length.
+            min_radius -- the smallest radius of circle to keep.
+            tol -- the tolerance for deduplication (0 to keep every circle).
+
+            Returns: a float64 array of shape (K, 5), with columns x, y, radius, word, seed: the circle with centre x+yi
+            and the given radius is the image of the circle circles[seed] under the word with integer code `word`
+            (see `encode_word`). The codes are exact while (2n + 1)**depth < 2**53.
+        """
+        circles = np.array([[float(p[i]) for i in range(4)] for p in circles]) if not isinstance(circles, np.ndarray) else circles.astype(float)
+        base = 2*self.length + 1
+        seeds = np.arange(len(circles), dtype=float)
+
+        matrices = np.eye(2, dtype=np.complex128)[np.newaxis]
+        states = np.array([self.automaton.start], dtype=np.intp)
+        codes = np.zeros(1)
+        results = []
+
+        for n in range(depth + 1):
+            if n > 0:
+                parents, letters, states = self._next_level_arrays(states, n == 1)
+                matrices = self.generator_array[letters] @ matrices[parents]
+                codes = (letters + 1) + base*codes[parents]
+
+            images = map_circles_array(matrices, circles)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x, y = images[...,1]/images[...,0], images[...,2]/images[...,0]
+                radii = np.sqrt(np.maximum(x**2 + y**2 - images[...,3]/images[...,0], 0))
+            finite = np.isfinite(x) & np.isfinite(y) & np.isfinite(radii)
+            keep = finite & (radii >= min_radius)
+            words, which = np.nonzero(keep)
+            results.append(np.stack([x[keep], y[keep], radii[keep], codes[words], seeds[which]], axis=1))
+
+            expand = (~finite | (radii >= min_radius)).any(axis=1)
+            matrices, states, codes = matrices[expand], states[expand], codes[expand]
+
+        orbit = np.concatenate(results)
+        if tol <= 0:
+            return orbit
+
+        # Pairs i < j of circles with centres closer than tol; j is dropped if it is close to a circle that is kept.
+        # Sorting by j means every circle's fate is settled before the pairs in which it comes first.
+        pairs = spatial.CircleIndex(orbit[:,0], orbit[:,1], tol/2).overlapping_pairs()
+        pairs = pairs[np.abs(orbit[pairs[:,0],2] - orbit[pairs[:,1],2]) <= tol]
+        pairs = pairs[np.lexsort((pairs[:,0], pairs[:,1]))]
+        keep = np.ones(len(orbit), dtype=bool)
+        for i, j in pairs.tolist():
+            if keep[i]:
+                keep[j] = False
+        return orbit[keep]
+
     def fixed_points(self, word):
         """ Compute the fixed points of `word` as it acts on the projective line."""
         return mobius_fixed_points(self[word])
@@ -458,7 +1630,30 @@ class GroupCache:
     def subgroup(self, words):
         """ Construct the subgroup generated by the given list of words. """
         matrices = [self[word] for word in words]
-        return GroupCache(matrices, names = [self.word_to_fancyword(word) for word in words] if self.names != None else None)
+        precision = PrecisionPolicy(self.precision.mode, self.precision.dps, self.precision.threshold)
+        return GroupCache(matrices, names = [self.word_to_fancyword(word) for word in words] if self.names != None else None, precision = precision)
+
+
+def deserialise_generators(generators):
+    """ Rebuild a list of mp.matrix objects from the output of `GroupCache.serialise_generators`. """
+    return [mp.matrix([[mp.mpc(*entry) for entry in row] for row in g]) for g in generators]
+
+def _parallel_limit_set_task(arguments):
+    """ One task of `GroupCache.parallel_limit_set`; this runs in a worker process. """
+    generators, dps, count, walkers, seed, rebase_when, stream, raster = arguments
+    with mp.workdps(dps):
+        G = GroupCache(deserialise_generators(generators))
+        if seed is not None:
+            seed = mp.inf if seed == 'inf' else mp.mpc(*seed)
+        chunks = G._walker_chunks(count, min(walkers, count), seed, rebase_when, np.random.default_rng(stream))
+        if raster is not None:
+            extent, shape = raster
+            result = np.zeros(shape, dtype=np.int64)
+            for chunk in chunks:
+                accumulate_raster(result, chunk, extent)
+            return result
+        chunks = list(chunks)
+    return { column: np.concatenate([chunk[column] for chunk in chunks]) for column in ('x','y','colour') }
 
 
 def generators_from_circle_inversions(circles, lines):
@@ -555,82 +1750,61 @@ def action_on_circles(M, oph = True):
         such that the circle is the locus of z s.t. a0 |z|^2 - 2(a1,a2).z + a3 = 0.
 
         This function takes a 2x2 matrix M (over C) and a flag oph to determine whether the map
-        is precomposed with complex conjugation. The return value is a 4x4 matrix representing the action
+        is precomposed with complex conjugation (it is if oph is False). The return value is a 4x4 matrix representing the action
         of M on the space of circles just described.
     """
 
-    # Translate M into an action on the coordinate vector of a circle (c.f. [beardon, Theorem 3.2.3]).
-    # For this we need to split M up into a product of translations, dilatations, rigid motions, and circle inversions.
-    # We take the decomposition listed in [Maskit, I.C.2].
+    # The circle with coordinates (a0,a1,a2,a3) is the zero set of the Hermitian form v^H H v on homogeneous vectors v,
+    # where H = [[a0, -(a1 + i a2)], [-(a1 - i a2), a3]]. Its image under M is the zero set of (M^-1)^H H M^-1, and
+    # M^-1 may be replaced by its adjugate since only the form up to a positive scalar matters; the columns of the
+    # action are the images of the four basis circles.
+    columns = _circle_action_columns(M[1,1], -M[0,1], -M[1,0], M[0,0], mp.conj)
+    A = mp.matrix([[columns[j][i] for j in range(4)] for i in range(4)])
+    if not oph:
+        A = A @ mp.diag([1,1,-1,1])
+    return A
 
-    a = M[0,0]
-    b = M[0,1]
-    c = M[1,0]
-    d = M[1,1]
-
-    def orthogonal_transform(A):
-        B = mp.eye(4)
-        B[1:3,1:3] = A
-        return B
-
-    def dilate(k):
-        return mp.diag([1,k,k,k**2])
-
-    def unit_circle_reflect():
-        return mp.matrix([[0,0,0,1],[0,1,0,0],[0,0,1,0],[1,0,0,0]])
-
-    def translate(u):
-        return mp.matrix([[1,0,0,0],[u.real,1,0,0],[u.imag,0,1,0],[abs(u)**2, 2*u.real, 2*u.imag, 1]])
-
-    def reflect_in_circle(centre, radius):
-        return translate(centre) @ dilate(radius) @ unit_circle_reflect() @ dilate(1/radius) @ translate(-centre)
-
-    # Useful orthogonal 2x2 matrix
-    def rotate(theta):
-        return mp.matrix([[mp.cos(theta),-mp.sin(theta)],[mp.sin(theta),mp.cos(theta)]])
-    def reflect_in_x():
-        return mp.matrix([[1,0],[0,-1]])
-
-    def reflect_in_bisector(p, q):
-        theta = mp.pi/2 + mp.arg(p-q)
-        return translate((p+q)/2) @ orthogonal_transform(reflect_in_x() @ rotate(-2*theta)) @ translate(-(p+q)/2)
-
-    # If c is 0 we have a Euclidean motion, otherwise we follow I.C.2 of Maskit
-    if c != 0:
-        alpha = -d/c
-        alphaprime = a/c
-        rad = 1/abs(c)
-
-        # p is reflection in the isometric circle, q is reflection in bisector of the line joining the iso circle centres.
-        p = reflect_in_circle(alpha,rad)
-        q = reflect_in_bisector(alpha,alphaprime) if alpha != alphaprime else mp.eye(4)
-
-        # r is rotation with a reflection if oph = False
-        # here theta is the rotation between the isometric circle (alpha, rad) and the circle (alphaprime, rad)
-        if alpha != alphaprime:
-            base_point_1 = rad/abs(alpha-alphaprime) * alpha + (1-rad/abs(alpha-alphaprime)) * alphaprime
-            base_point_2 = rad/abs(alpha-alphaprime) * alphaprime + (1-rad/abs(alpha-alphaprime)) * alpha
-        else:
-            base_point_1 = alpha + rad*1j
-            base_point_2 = base_point_1
-        moved_point = M @ mp.matrix([base_point_1,1])
-        moved_point = moved_point[0]/moved_point[1]
-        theta = mp.arg( (moved_point - alphaprime) / (base_point_2 - alphaprime) )
-        # need to know if r is orientation preserving or not.
-        # f = r.q.p; since p is always orientation reversing, if f is orientation preserving then r is orientation reversing iff q is trivial
-        if oph and (q == mp.eye(4)):
-            # If we are reflecting then the angle of rotation will be off by pi.
-            r = translate(alphaprime) @ orthogonal_transform(rotate(theta - mp.pi)) @ orthogonal_transform(reflect_in_x()) @ translate(-alphaprime)
-        else:
-            r = translate(alphaprime) @ orthogonal_transform(rotate(theta)) @ translate(-alphaprime)
+def _circle_action_columns(p, q, r, s, conj):
+    """ The four columns of the action on circle space of the Mobius transformation with inverse [[p, q], [r, s]].
 
-        return r @ q @ p
-    else:
-        # The transformation is z -> (a/d) z + b/d possibly with a conjugation
-        if oph:
-            return translate(b/d) @ dilate(a/d)
-        else:
-            return translate(b/d) @ dilate(a/d) @ orthogonal_transform(reflect_in_x())
+        This works entrywise both for mpmath numbers and for NumPy arrays, given the matching `conj`.
+    """
+    ps = conj(p)*s
+    rq = conj(r)*q
+    pq = conj(p)*q
+    pr = conj(p)*r
+    qs = conj(q)*s
+    rs = conj(r)*s
+    return [[(p*conj(p)).real, -pq.real, -pq.imag, (q*conj(q)).real],
+            [-2*pr.real, (ps + rq).real, (ps + rq).imag, -2*qs.real],
+            [2*pr.imag, -(ps - rq).imag, (ps - rq).real, 2*qs.imag],
+            [(r*conj(r)).real, -rs.real, -rs.imag, (s*conj(s)).real]]
+
+def action_on_circles_array(M, oph=True):
+    """ Compute the action on the space of circles of an array of Mobius transformations of shape (..., 2, 2).
+
+        This is the vectorised version of `action_on_circles`, using the same coordinates on circle space.
+
+        Returns: a float64 array of shape (..., 4, 4).
+    """
+    M = np.asarray(M, dtype=np.complex128)
+    columns = _circle_action_columns(M[...,1,1], -M[...,0,1], -M[...,1,0], M[...,0,0], np.conj)
+    A = np.stack([np.stack([np.real(entry) for entry in column], axis=-1) for column in columns], axis=-1)
+    if not oph:
+        A[...,2] *= -1
+    return A
+
+def map_circles_array(M, circles, oph=True):
+    """ Map N circles by each of an array of Mobius transformations at once.
+
+        Arguments:
+        M -- an array of transformations of shape (..., 2, 2).
+        circles -- an array of shape (N, 4) of circles in the coordinates of `action_on_circles`
+                   (e.g. rows produced by `circle_in_circle_space`).
+
+        Returns: a float64 array of shape (..., N, 4) whose [..., k, :] entry is the image of the kth circle.
+    """
+    return np.einsum('...ij,nj->...ni', action_on_circles_array(M, oph), np.asarray(circles, dtype=float))
 
 def normalise_mobius_pair(A,B):
     """ Simultaneously normalise two Mobius transformations.
@@ -692,6 +1866,117 @@ def mobius_fixed_points(M):
         else:
             return [(-(d-a)+mp.sqrt(Δ))/(2*c), (-(d-a)-mp.sqrt(Δ))/(2*c)]
 
+def mobius_attracting_fixed_point(M):
+    """ Return the attracting fixed point of the transformation M.
+
+        This is the fixed point at which the derivative of M is smallest; if M is parabolic it is the unique fixed point,
+        and if M is elliptic it is whichever fixed point `mobius_fixed_points` lists first.
+    """
+    a = M[0,0]
+    c = M[1,0]
+    d = M[1,1]
+    det = simple_det(M)
+
+    def multiplier(z):
+        if z == mp.inf:
+            return mp.fabs(d/a)
+        return mp.fabs(det/(c*z + d)**2)
+
+    return min(mobius_fixed_points(M), key=multiplier)
+
+def mobius_isometric_circle(M):
+    """ Return the isometric circle of the transformation M.
+
+        Returns: (centre, radius) where centre is complex and radius is real, or (inf, inf)
+        if M fixes infinity.
+    """
+    if M[1,0] == 0:
+        return (mp.inf,mp.inf)
+    centre = -M[1,1]/M[1,0]
+    radius = mp.fabs(1/M[1,0])
+    return (centre, radius)
+
+
+def mobius_trace_array(M):
+    """ Return the traces of an array of matrices of shape (..., 2, 2). """
+    M = np.asarray(M)
+    return M[...,0,0] + M[...,1,1]
+
+def mobius_action_array(M, z):
+    """ Apply an array of transformations to an array of points, z -> (az+b)/(cz+d).
+
+        M has shape (..., 2, 2) and z (which may contain infinity, written as complex(inf, 0)) is broadcast against
+        the leading axes of M. The cases where either z or its image is infinity are handled by masking, so no
+        invalid value warnings are raised.
+
+        Returns: a complex128 array of the images, with infinity written as complex(inf, 0).
+    """
+    M = np.asarray(M, dtype=np.complex128)
+    z = np.asarray(z, dtype=np.complex128)
+    a, b, c, d = np.broadcast_arrays(M[...,0,0], M[...,0,1], M[...,1,0], M[...,1,1], z)[:4]
+    z = np.broadcast_to(z, a.shape)
+
+    at_infinity = np.isinf(z)
+    finite_z = np.where(at_infinity, 0, z)
+    numerator = np.where(at_infinity, a, a*finite_z + b)
+    denominator = np.where(at_infinity, c, c*finite_z + d)
+    zero = (denominator == 0)
+    return np.where(zero, np.inf, numerator/np.where(zero, 1, denominator))
+
+def mobius_fixed_points_array(M):
+    """ Return the fixed points of an array of transformations of shape (..., 2, 2).
+
+        This is the vectorised version of `mobius_fixed_points`: the fixed points are listed in the same order and
+        infinity (written as complex(inf, 0)) comes first when it is fixed. Transformations with a single fixed point
+        have it listed twice.
+
+        Returns: a complex128 array of shape (..., 2).
+    """
+    M = np.asarray(M, dtype=np.complex128)
+    a, b, c, d = M[...,0,0], M[...,0,1], M[...,1,0], M[...,1,1]
+
+    fixes_infinity = (c == 0)
+    safe_c = np.where(fixes_infinity, 1, c)
+    root = np.sqrt((d-a)**2 + 4*b*c)
+    first = np.where(fixes_infinity, np.inf, (-(d-a) + root)/(2*safe_c))
+    second = (-(d-a) - root)/(2*safe_c)
+
+    # If c = 0 the other fixed point is b/(d-a), unless a = d and infinity is the only one.
+    only_infinity = fixes_infinity & (d == a)
+    second = np.where(fixes_infinity, b/np.where(fixes_infinity & ~only_infinity, d-a, 1), second)
+    second = np.where(only_infinity, np.inf, second)
+    return np.stack([first, second], axis=-1)
+
+def mobius_classify_array(M, tol=1e-10):
+    """ Classify an array of transformations of shape (..., 2, 2).
+
+        The trace is normalised by the square root of the determinant, and a transformation is parabolic if its
+        normalised trace squared is within `tol` of 4, elliptic if its normalised trace is real with absolute value
+        less than 2, and loxodromic (including hyperbolic) otherwise; scalar matrices are classified as the identity.
+
+        Returns: (kinds, multipliers) where kinds is an array of the strings 'identity', 'parabolic', 'elliptic' and
+        'loxodromic', and multipliers is a complex128 array of the multipliers k, with |k| >= 1, such that each
+        transformation is conjugate to z -> kz (so k = 1 for parabolic transformations and the identity).
+    """
+    M = np.asarray(M, dtype=np.complex128)
+    trace = mobius_trace_array(M)/np.sqrt(M[...,0,0]*M[...,1,1] - M[...,0,1]*M[...,1,0])
+
+    # The eigenvalues of the normalised matrix are λ and 1/λ, with λ + 1/λ = trace; take |λ| >= 1.
+    λ = (trace + np.sqrt(trace**2 - 4))/2
+    λ = np.where(np.abs(λ) < 1, 1/λ, λ)
+    multipliers = λ**2
+
+    parabolic = np.abs(trace**2 - 4) <= tol
+    elliptic = ~parabolic & (np.abs(trace.imag) <= tol) & (np.abs(trace.real) < 2)
+    identity = (M[...,0,1] == 0) & (M[...,1,0] == 0) & (M[...,0,0] == M[...,1,1])
+    multipliers = np.where(parabolic | identity, 1, multipliers)
+
+    kinds = np.full(trace.shape, 'loxodromic', dtype='<U10')
+    kinds[elliptic] = 'elliptic'
+    kinds[parabolic] = 'parabolic'
+    kinds[identity] = 'identity'
+    return (kinds, multipliers)
+
 
 def circle_through_points(z1,z2,z3):
     """ Return a point in P^4 corresponding to the circle through three complex points.
@@ -6,8 +6,9 @@ import functools
 import itertools
 from warnings import warn
 from mpmath import mp
+import numpy as np
 from numpy.polynomial import Polynomial as P
-P.__hash__ = lambda self: tuple(self.coef).__hash__()
+from . import cayley
 
 class FractionOutOfRangeException(Exception):
     """ Thrown if a fraction parameter is out of range (e.g. some functions only allow fractions in [0,1]). """
@@ -258,6 +259,139 @@ def walk_tree_bfs(end = None):
 ###
 ##############################################
 
+class IntegerPolynomial:
+    """ A polynomial with (arbitrarily large) integer coefficients, e.g. a parabolic Farey polynomial.
+
+        The coefficients are a tuple of Python ints, lowest degree first (as in numpy.polynomial.Polynomial), so
+        all arithmetic is exact. Large products are done by Kronecker substitution: each polynomial is packed into a
+        single big integer with one fixed-width slot per coefficient, the integers are multiplied (which Python does
+        by Karatsuba multiplication), and the slots of the product are read back off.
+
+        Arithmetic with other integers and IntegerPolynomials stays exact; arithmetic with anything else (e.g. mpmath
+        numbers or numpy Polynomials) converts to a numpy Polynomial with mpmath coefficients first, see `to_numpy`.
+    """
+
+    # Below this length, products are done by schoolbook multiplication.
+    kronecker_threshold = 16
+
+    def __init__(self, coef):
+        coef = [int(c) for c in coef]
+        while len(coef) > 1 and coef[-1] == 0:
+            coef.pop()
+        self.coef = tuple(coef) if coef else (0,)
+
+    @classmethod
+    def from_polynomial(cls, poly):
+        """ Convert a numpy Polynomial (or a sequence of coefficients) whose coefficients are all integers.
+
+            Raises a ValueError if some coefficient is not an integer.
+        """
+        coef = poly.coef if isinstance(poly, P) else poly
+        if not all(mp.isint(c) for c in coef):
+            raise ValueError(f"polynomial {poly} does not have integer coefficients")
+        return cls(int(mp.re(c)) for c in coef)
+
+    def degree(self):
+        return len(self.coef) - 1
+
+    def __iter__(self):
+        return iter(self.coef)
+
+    def __len__(self):
+        return len(self.coef)
+
+    def __eq__(self, other):
+        if isinstance(other, int):
+            other = IntegerPolynomial([other])
+        return isinstance(other, IntegerPolynomial) and self.coef == other.coef
+
+    def __hash__(self):
+        return hash(self.coef)
+
+    def __repr__(self):
+        return f"IntegerPolynomial({list(self.coef)})"
+
+    def __str__(self):
+        terms = [f"{c}" if n == 0 else f"{c}·x" if n == 1 else f"{c}·x**{n}" for n, c in enumerate(self.coef) if c != 0 or len(self.coef) == 1]
+        return ' + '.join(terms).replace('+ -', '- ')
+
+    def to_numpy(self):
+        """ Convert to a numpy Polynomial with mpmath coefficients, as the other polynomials in this module are. """
+        return P([mp.mpf(c) for c in self.coef])
+
+    def deriv(self):
+        return IntegerPolynomial([n*c for n, c in enumerate(self.coef)][1:] or [0])
+
+    def __call__(self, z):
+        """ Evaluate by Horner's rule; for NumPy arrays the coefficients are first rounded to complex128. """
+        coef = [complex(c) for c in self.coef] if isinstance(z, np.ndarray) else self.coef
+        value = coef[-1]
+        for c in reversed(coef[:-1]):
+            value = value*z + c
+        return value
+
+    def __neg__(self):
+        return IntegerPolynomial([-c for c in self.coef])
+
+    def __add__(self, other):
+        if isinstance(other, int):
+            other = IntegerPolynomial([other])
+        if not isinstance(other, IntegerPolynomial):
+            return self.to_numpy() + other
+        a, b = (self.coef, other.coef) if len(self.coef) >= len(other.coef) else (other.coef, self.coef)
+        return IntegerPolynomial([x + y for x, y in zip(a, b)] + list(a[len(b):]))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            return IntegerPolynomial([other*c for c in self.coef])
+        if not isinstance(other, IntegerPolynomial):
+            return self.to_numpy() * other
+        a, b = self.coef, other.coef
+        if min(len(a), len(b)) < self.kronecker_threshold:
+            product = [0]*(len(a) + len(b) - 1)
+            for i, x in enumerate(a):
+                if x:
+                    for j, y in enumerate(b):
+                        product[i+j] += x*y
+            return IntegerPolynomial(product)
+        return IntegerPolynomial(_kronecker_product(a, b))
+
+    __rmul__ = __mul__
+
+    def __pow__(self, n):
+        result = IntegerPolynomial([1])
+        for _ in range(n):
+            result = result*self
+        return result
+
+def _kronecker_product(a, b):
+    """ Multiply the integer coefficient lists `a` and `b` by packing them into big integers. """
+    # Every coefficient of the product is less than 2**(width - 1) in absolute value, with width a whole number of bytes.
+    bound = max(abs(x) for x in a) * max(abs(y) for y in b) * min(len(a), len(b))
+    width = 8*((bound.bit_length() + 2 + 7)//8)
+    nbytes = width//8
+    half = 1 << (width - 1)
+    length = len(a) + len(b) - 1
+
+    # Each slot holds coefficient + 2**(width-1), which lies in [0, 2**width); subtracting the same offset from
+    # every slot gives back the signed packing sum(c_i 2**(width*i)).
+    def offset(n):
+        return int.from_bytes((b'\x00'*(nbytes - 1) + b'\x80')*n, 'little')
+
+    def pack(coef):
+        return int.from_bytes(b''.join((c + half).to_bytes(nbytes, 'little') for c in coef), 'little') - offset(len(coef))
+
+    packed = (pack(a)*pack(b) + offset(length)).to_bytes(nbytes*length, 'little')
+    return [int.from_bytes(packed[n*nbytes:(n+1)*nbytes], 'little') - half for n in range(length)]
+
 def numpy_to_mpmath_polynomial(np_poly):
     """ Convert a numpy polynomial to a polynomial that mpmath will accept. """
     return list(reversed(np_poly.coef))
@@ -275,37 +409,201 @@ def solve_polynomial(np_poly, maxsteps=500, extraprec=1000):
     yield from mp.polyroots( numpy_to_mpmath_polynomial(np_poly), maxsteps=maxsteps, extraprec=extraprec, roots_init=fast_roots)
 
 
-@functools.cache
+# Farey polynomials already computed, keyed on the trace parameters and the fraction; see `farey_polynomial`.
+polynomial_cache = cayley.WordCache(maxsize=2**12)
+
+def clear_polynomial_cache():
+    """ Forget all cached Farey polynomials. """
+    polynomial_cache.clear()
+
+def _trace_key(t):
+    """ A hashable key for a trace parameter: a polynomial (numpy or IntegerPolynomial) or a number. """
+    return (type(t), tuple(t.coef)) if hasattr(t, 'coef') else (type(t), t)
+
 def farey_polynomial(r,s,trX,trY,trXY):
     """ Return the Farey polynomial of slope r/s as a numpy.polynomial.Polynomial object
 
-        The method used is the recursion algorithm.
+        The method used is the recursion algorithm, run iteratively down the Stern-Brocot tree: the walk keeps the
+        polynomials of the two endpoints L, R of the current interval and of the fraction D = |L - R| (D being 1/0, with
+        polynomial 2, at the start) and moves to the mediant M of L and R, whose polynomial is c - F(L)F(R) - F(D), where
+        c = trX^2 + trY^2 if the denominator of M is even and 2 trX trY otherwise. Going left, D becomes the old R; going
+        right, D becomes the old L. So only three polynomials are ever held at once.
+
+        The polynomials met on the way are kept in `polynomial_cache`, a bounded LRU cache (see `cayley.WordCache`) keyed
+        on the trace parameters, which can be emptied by `clear_polynomial_cache()`.
 
         Arguments:
           r,s -- coprime integers representing the slope of the desired polynomial
           trX, trY, trXY -- initial values for the trace of X, Y, and XY: if you want to compute
             the Farey polynomial after substituting X -> X^2, for instance, pass trX = tr(X^2). These
-            values are mpmath polynomials. Note also, tr XY = tr YX.
+            values are mpmath polynomials (or IntegerPolynomials, or numbers, to evaluate the polynomial at a point).
+            Note also, tr XY = tr YX.
     """
+    key = (_trace_key(trX), _trace_key(trY), _trace_key(trXY))
+
+    def cached(p, q, compute):
+        value = polynomial_cache.get((key, p, q))
+        if value is None:
+            value = compute()
+            polynomial_cache[(key, p, q)] = value
+        return value
+
+    return _farey_recursion(r, s, trX, trY, trXY, cached)
 
+def farey_trace(r, s, trX, trY, trXY):
+    """ Evaluate the r/s Farey polynomial at a point, or at an array of points, without building any polynomial.
+
+        This runs the same walk down the Stern-Brocot tree as `farey_polynomial`, but with numbers (or NumPy arrays)
+        trX, trY, trXY, the traces already evaluated at the point(s) of interest; nothing is cached.
+        For example, farey_trace(r, s, *(t(μ) for t in riley.traces_from_holonomies(θ, η))).
+    """
+    return _farey_recursion(r, s, trX, trY, trXY, lambda p, q, compute: compute())
+
+def _farey_recursion(r, s, trX, trY, trXY, cached):
+    """ Walk down the Stern-Brocot tree to r/s, computing each Farey polynomial on the way by cached(p, q, compute). """
+
+    # tr YX + tr yX = tr X tr Y
+    left = cached(0, 1, lambda: trX*trY - trXY)
     if r == 0 and s == 1:
-        # tr YX + tr yX = tr X tr Y
-        return trX*trY - trXY
+        return left
+    right = cached(1, 1, lambda: trXY)
     if r == 1 and s == 1:
-        return trXY
-    if r == 1 and s == 2:
-        # tr yxYX = tr YXyx = tr[Y,X] = trX^2 + trY^2 + tr^2 XY - trX*trY*trXY - 2
-        return trX**2 + trY**2 + trXY**2 - trX*trY*trXY - 2
-
-    (p1,q1),(p2,q2) = neighbours(r,s)
-    constant = trX**2 + trY**2 if ((q1 + q2) % 2) == 0 else 2*trX*trY
+        return right
+    if not (0 < r < s) or math.gcd(r,s) != 1:
+        raise FractionOutOfRangeException('Farey polynomials are defined for coprime r/s in the interval [0,1]')
+
+    even_constant = trX**2 + trY**2
+    odd_constant = 2*trX*trY
+    (pL, qL), (pR, qR) = (0, 1), (1, 1)
+    difference = 2
+    while True:
+        pM, qM = pL + pR, qL + qR
+        mediant = cached(pM, qM, lambda: (even_constant if qM % 2 == 0 else odd_constant) - left*right - difference)
+        if (pM, qM) == (r, s):
+            return mediant
+        if r*qM < pM*s:
+            difference = right
+            (pR, qR), right = (pM, qM), mediant
+        else:
+            difference = left
+            (pL, qL), left = (pM, qM), mediant
+
+def farey_traces(trX, trY, trXY, end=None):
+    """ Evaluate every Farey polynomial at a point (or an array of points), in the order of `walk_tree_bfs(end)`.
+
+        The traces trX, trY, trXY are numbers or NumPy arrays, already evaluated at the point(s) of interest. Every fraction
+        with denominator s > 2 has both of its Farey neighbours (and their difference) among the fractions of smaller
+        denominator, so each value is computed with one product from values already found: the cost is O(1) per fraction,
+        rather than building and evaluating a polynomial of degree s.
+
+        The price is memory: a fraction a/b is a Farey neighbour of fractions of arbitrarily large denominator (e.g. 1/1 of
+        every n/(n+1)), so no value can be forgotten while the walk goes on, and the values of all of the roughly 0.3 s**2
+        fractions of denominator below s are held. Pass `end` to bound this; with `end` = None the memory grows without
+        bound as the stream is consumed, so for long runs either give `end`, or evaluate fractions one at a time with
+        `farey_trace`, which needs only the Stern-Brocot path of each fraction.
+
+        Generates: pairs ((r,s), value).
+    """
+    values = { (1,0): 2 }
+    even_constant = trX**2 + trY**2
+    odd_constant = 2*trX*trY
+    for (r,s) in walk_tree_bfs(end):
+        if (r,s) == (0,1):
+            # tr YX + tr yX = tr X tr Y
+            value = trX*trY - trXY
+        elif (r,s) == (1,1):
+            value = trXY
+        else:
+            (p1,q1),(p2,q2) = neighbours(r,s)
+            value = (even_constant if s % 2 == 0 else odd_constant) - values[(p1,q1)]*values[(p2,q2)] - values[(abs(p1-p2),abs(q1-q2))]
+        values[(r,s)] = value
+        yield ((r,s), value)
+
+def classify_grid(trX, trY, trXY, max_denominator, accept):
+    """ Find, for each point of a grid, the first Farey polynomial whose value there passes a test.
+
+        The traces trX, trY, trXY are NumPy arrays of the same shape (or numbers), already evaluated at the grid points.
+        The Farey recursion is run depth-first down the Stern-Brocot tree, to denominator at most `max_denominator`,
+        on all of the points at once: each node of the tree costs one vectorised product. Since the denominators
+        increase down the tree, a point which has already passed at a fraction of denominator q is dropped from every
+        subtree below a node of denominator >= q, so points which are classified early cost nothing further.
 
-    return constant - farey_polynomial(p1,q1,trX,trY,trXY)*farey_polynomial(p2,q2,trX,trY,trXY) - farey_polynomial(abs(p1-p2),abs(q1-q2),trX,trY,trXY)
+        Arguments:
+          trX, trY, trXY -- the trace parameters, evaluated at the grid.
+          max_denominator -- the largest denominator of fraction to try.
+          accept -- a function taking an array of values of a Farey polynomial and returning a boolean array, True
+                    at the points that pass.
+
+        Returns: (values, numerators, denominators), arrays of the shape of the grid: at each point, r/s is the fraction
+        of smallest denominator (and then smallest numerator) at which the test passes, and values is the value of the
+        r/s Farey polynomial there; where no fraction passes, r = s = 0 and the value is nan.
+    """
+    trX, trY, trXY = np.broadcast_arrays(*(np.asarray(t, dtype=np.complex128) for t in (trX, trY, trXY)))
+    shape = trX.shape
+    trX, trY, trXY = trX.ravel(), trY.ravel(), trXY.ravel()
+    count = len(trX)
+
+    values = np.full(count, np.nan, dtype=np.complex128)
+    numerators = np.zeros(count, dtype=np.int64)
+    denominators = np.zeros(count, dtype=np.int64)
+    best = np.full(count, max_denominator + 1, dtype=np.int64) # denominator of the classifying fraction so far
+
+    def record(points, r, s, value):
+        with np.errstate(invalid='ignore', over='ignore', divide='ignore'):
+            passed = np.asarray(accept(value), dtype=bool)
+        better = passed & ((s < best[points]) | ((s == best[points]) & (r < numerators[points])))
+        points = points[better]
+        best[points] = s
+        numerators[points] = r
+        denominators[points] = s
+        values[points] = value[better]
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        even_constant = trX**2 + trY**2
+        odd_constant = 2*trX*trY
+        everywhere = np.arange(count)
+        # tr YX + tr yX = tr X tr Y
+        left = trX*trY - trXY
+        right = trXY
+        record(everywhere, 0, 1, left)
+        record(everywhere, 1, 1, right)
+
+        active = best > 1
+        stack = [(everywhere[active], (0,1), left[active], (1,1), right[active], 2)]
+        while stack:
+            points, (pL, qL), left, (pR, qR), right, difference = stack.pop()
+            pM, qM = pL + pR, qL + qR
+            constant = even_constant[points] if qM % 2 == 0 else odd_constant[points]
+            mediant = constant - left*right - difference
+            record(points, pM, qM, mediant)
+
+            active = best[points] > qM
+            if not active.any():
+                continue
+            points, left, right, mediant = points[active], left[active], right[active], mediant[active]
+            difference = difference[active] if isinstance(difference, np.ndarray) else difference
+            # Going right, the difference becomes the old left endpoint; going left, the old right endpoint.
+            if qM + qR <= max_denominator:
+                stack.append((points, (pM, qM), mediant, (pR, qR), right, left))
+            if qL + qM <= max_denominator:
+                stack.append((points, (pL, qL), left, (pM, qM), mediant, right))
+
+    return (values.reshape(shape), numerators.reshape(shape), denominators.reshape(shape))
+
+def integral_traces(trX, trY, trXY):
+    """ Return the trace polynomials as IntegerPolynomials if they all have integer coefficients, and unchanged otherwise.
+
+        In the parabolic case (trX = trY = 2, trXY = 2 + z) this makes the Farey recursion exact integer arithmetic.
+    """
+    try:
+        return tuple(IntegerPolynomial.from_polynomial(t) for t in (trX, trY, trXY))
+    except ValueError:
+        return (trX, trY, trXY)
 
 def farey_polynomial_classic(r,s,p,q):
     """ Return the Farey polynomial of slope r/s as a numpy.polynomial.Polynomial object, from generator orders
 
-        The method used is the recursion algorithm.
+        The method used is the recursion algorithm. If both generators are parabolic, the polynomial is an IntegerPolynomial.
 
         Arguments:
           r,s -- coprime integers representing the slope of the desired polynomial
@@ -327,11 +625,11 @@ def farey_polynomial_classic(r,s,p,q):
     z_coefficient_Y_contribution = 1 if mp.sin(η) == 0 else mp.sin(η)/mp.sin(η)
     trXY = P([ 2*mp.cos(θ + η), z_coefficient_X_contribution*z_coefficient_Y_contribution ])
 
-    return farey_polynomial(r,s,trX,trY,trXY)
+    return farey_polynomial(r,s,*integral_traces(trX,trY,trXY))
 
 @functools.cache
 def riley_polynomial(r,s):
-    """ Return the Riley polynomial of slope r/s as a numpy.polynomial.Polynomial object
+    """ Return the Riley polynomial of slope r/s as an IntegerPolynomial
 
         We use Chesebro's recursion (https://arxiv.org/abs/1902.01968). The underlying group is always an infinity-infinity Riley group.
 
@@ -340,15 +638,15 @@ def riley_polynomial(r,s):
     """
 
     if r == 0 and s == 1:
-        return P([1])
+        return IntegerPolynomial([1])
     if r == 1 and s == 1:
-        return P([1])
+        return IntegerPolynomial([1])
     if r == 1 and s == 0:
-        return P([0])
+        return IntegerPolynomial([0])
 
     (p1,q1),(p2,q2) = neighbours(r,s)
-    k = 1 if abs(q1-q2) % 2 == 0 else ( P([0,1]) if abs( (p1-p2)*(q1-q2) ) % 2 == 1 else  P([0,-1]) )
-    p =  k*riley_polynomial(p1,q1)*riley_polynomial(p2,q2) - riley_polynomial(mp.fabs(p1-p2),mp.fabs(q1-q2))
+    k = 1 if abs(q1-q2) % 2 == 0 else ( IntegerPolynomial([0,1]) if abs( (p1-p2)*(q1-q2) ) % 2 == 1 else  IntegerPolynomial([0,-1]) )
+    p =  k*riley_polynomial(p1,q1)*riley_polynomial(p2,q2) - riley_polynomial(abs(p1-p2),abs(q1-q2))
 
 
     return p
@@ -508,17 +806,39 @@ def collapse_continued_fraction(expansion):
 ###
 ##############################################
 
-def newtons_method(f, z0, df = None, tol_re = 1e-10, tol_im = 1e-20):
+def newtons_method(f, z0, df = None, tol_re = 1e-10, tol_im = 1e-20, maxsteps = None):
     """ Run Newton's method starting at z0 until reaching the given tolerance.
 
-        Real and imaginary tolerances can be given separately.
+        Real and imaginary tolerances can be given separately. If z0 is a NumPy array of starting points then they
+        are iterated together (f and df must then act on arrays, and the tolerances may be arrays of the same shape),
+        each point being left alone once it is within tolerance. If maxsteps is not None, mp.NoConvergence is raised
+        when the tolerance is not met after that many steps.
     """
 
     if df == None:
         df = f.deriv()
 
+    if isinstance(z0, np.ndarray):
+        z0 = z0.astype(np.complex128)
+        w0 = f(z0)
+        steps = 0
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            pending = (np.abs(w0.real) > tol_re) | (np.abs(w0.imag) > tol_im)
+            while pending.any():
+                if maxsteps is not None and steps >= maxsteps:
+                    raise mp.NoConvergence(f"Newton's method did not converge at {np.count_nonzero(pending)} points")
+                steps += 1
+                z0 = np.where(pending, z0 - w0/df(z0), z0)
+                w0 = f(z0)
+                pending = (np.abs(w0.real) > tol_re) | (np.abs(w0.imag) > tol_im)
+        return z0
+
     w0 = f(z0)
+    steps = 0
     while mp.fabs(w0.real) > tol_re or mp.fabs(w0.imag) > tol_im:
+        if maxsteps is not None and steps >= maxsteps:
+            raise mp.NoConvergence(f"Newton's method did not converge from {z0}")
+        steps += 1
         z0 = z0 - w0/df(z0)
         w0 = f(z0)
 
@@ -555,3 +875,51 @@ def approximate_pleating_ray(r, s, p, q, R = 20, N = 10, end_at_cusp=True):
         z.append(newtons_method(f - tr, z[-1], df))
 
     return z
+
+def track_level_set(f, levels, roots=None, tol=1e-12, maxsteps=10, max_halvings=30):
+    """ Follow the roots of f - t as t moves through the given levels, by predictor-corrector continuation.
+
+        All of the roots are carried together as a NumPy array (in complex128 arithmetic). For each step from t0 to
+        t1 an Euler step z + (t1 - t0)/f'(z) predicts the new roots, and `newtons_method` corrects them onto the level
+        set f = t1. If the corrector does not converge within `maxsteps` steps, or moves some root further than the
+        predictor did (so that it may have jumped onto another path), the step is halved, up to `max_halvings` times.
+        This generalises `approximate_pleating_ray`, which follows a single root down a pleating ray.
+
+        Arguments:
+          f -- a polynomial (numpy Polynomial or IntegerPolynomial), e.g. a Farey polynomial.
+          levels -- a sequence of values t, e.g. a grid of the ray [-2, -inf).
+          roots -- starting roots of f - levels[0]; if None, all of them are computed with `solve_polynomial`.
+          tol -- tolerance of the corrector, relative to the size of the terms of f at the root.
+
+        Returns: an array of shape (len(levels), number of roots), whose k-th row are the roots of f - levels[k]; so
+        each column is a path along the level curves.
+    """
+    levels = list(levels)
+    if roots is None:
+        roots = solve_polynomial(f - mp.mpmathify(levels[0]))
+    z = np.array([complex(root) for root in roots], dtype=np.complex128)
+
+    f = P([complex(c) for c in f.coef])
+    df = f.deriv()
+    size = P(np.abs(f.coef))
+
+    def step(z, t0, t1, halvings):
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            predicted = z + (t1 - t0)/df(z)
+            tolerance = tol*size(np.abs(predicted))
+            try:
+                corrected = newtons_method(lambda w: f(w) - t1, predicted, df, tolerance, tolerance, maxsteps)
+                jumped = np.abs(corrected - predicted) > np.abs(predicted - z) + tol*(1 + np.abs(z))
+                if np.isfinite(corrected).all() and not jumped.any():
+                    return corrected
+            except mp.NoConvergence:
+                pass
+        if halvings >= max_halvings:
+            raise mp.NoConvergence(f"Continuation of roots from level {t0} to {t1} failed")
+        middle = (t0 + t1)/2
+        return step(step(z, t0, middle, halvings + 1), middle, t1, halvings + 1)
+
+    path = [z]
+    for t0, t1 in zip(levels, levels[1:]):
+        path.append(step(path[-1], complex(t0), complex(t1), 0))
+    return np.array(path).reshape(len(levels), len(z))
@@ -39,3 +39,16 @@ def pairsToCircles(pairs):
     """ This helper function takes a list of pairs (centre,radius) and produces a Circles() chart. """
     df = pd.DataFrame([(float(centre.real), float(centre.imag), float(radius)) for centre, radius in pairs], columns=['x','y','radius'])
     return makeCircles(df, kdims = ['x'], vdims = ['y','radius']).opts(radius='radius')
+
+def aggregate_chunks(chunks, canvas, agg=None):
+    """ Feed column-oriented chunks of points (e.g. from cayley.GroupCache.coloured_limit_set_fast(..., chunk_size=N)) into a datashader canvas.
+
+        Each chunk is aggregated on its own and the aggregates are summed, so only one chunk of points is held in
+        memory at once. The default aggregate is a count of points per pixel. The result is an xarray.DataArray
+        suitable for datashader.transfer_functions.shade or hv.Image.
+    """
+    total = None
+    for chunk in chunks:
+        aggregate = canvas.points(pd.DataFrame(chunk), 'x', 'y', agg)
+        total = aggregate if total is None else total + aggregate
+    return total
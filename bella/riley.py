@@ -4,7 +4,6 @@
 from mpmath import mp
 from . import cayley
 from . import farey
-import functools
 from numpy.polynomial import Polynomial as P
 from enum import Enum, auto
 
@@ -21,10 +20,11 @@ class RileyGroup(cayley.GroupCache):
         In words represented as strings, x and y represent the inverses of X and Y respectively.
 
     """
-    def __init__(self, θ, η, μ, p=mp.inf, q=mp.inf):
+    def __init__(self, θ, η, μ, p=mp.inf, q=mp.inf, precision=None):
         """ Construct the Riley group on generators of holonomy angle θ and η with parameter μ.
 
             For the underlying group to know about finite-order generators, set p and q to the orders of X and Y.
+            The precision policy is passed on to `cayley.GroupCache`.
         """
 
         # Riley groups only make sense when η and θ are REAL and μ is complex.
@@ -52,37 +52,40 @@ class RileyGroup(cayley.GroupCache):
         self.X = X
         self.Y = Y
 
-        super().__init__([X,Y], relations)
+        super().__init__([X,Y], relations, names=['X','Y'], precision=precision)
         self.generator_map = {'X':0, 'Y':1, 'x':self.gen_to_inv[0], 'y':self.gen_to_inv[1]}
 
     def string_to_word(self, s):
         """ Produce a word in the GroupCache sense from a string of letters out of X, Y, x, y. """
-        return tuple(functools.reduce( (lambda x,y: x + (self.generator_map[y],)), s, tuple()))
+        return self.fancyword_to_word(s)
 
-    @functools.cache
     def farey_polynomial(self,r,s):
         return farey.farey_polynomial(r,s,self.trX,self.trY,self.trXY)
 
-    @functools.cache
     def farey_matrix(self, r, s):
         """ Return the r/s-Farey matrix in this group. """
         return self[self.string_to_word(farey.farey_word(r,s))]
 
-    @functools.cache
+    def farey_matrices(self, fractions, machine_precision=False):
+        """ Return the r/s-Farey matrices for a list of pairs (r,s), evaluated together by `cayley.GroupCache.evaluate_trie`. """
+        return self.evaluate_trie([self.string_to_word(farey.farey_word(r,s)) for (r,s) in fractions], machine_precision)
+
     def farey_fixed_points(self, r, s):
         """ Return the fixed points of the r/s-Farey matrix in this group. """
         return self.fixed_points(self.string_to_word(farey.farey_word(r,s)))
 
-    def guess_radial_coordinate(self, ε):
+    def guess_radial_coordinate(self, ε, end=None):
         """ Attempt to guess the Keen-Series coordinate of the group.
 
             More precisely, iterate over all possible r/s so that the Farey word
             W_r/s has trace in the cone of angle π*ε symmetric about the negative real
             axis; so if ε = 1 we are checking inclusion in our thickened neighbourhoods.
+
+            If `end` is not None, only fractions of denominator < `end` are tried (and None is returned if none
+            is found); otherwise the search, and the memory used by `farey.farey_traces`, is unbounded.
         """
-        for (r,s) in farey.walk_tree_bfs():
-            poly = farey.farey_polynomial(r, s, *traces_from_holonomies(self.θ,self.η))
-            v = poly(self.μ)
+        traces = [t(self.μ) for t in traces_from_holonomies(self.θ,self.η)]
+        for (r,s), v in farey.farey_traces(*traces, end=end):
             if v.real < -2:
                 θ = 2*mp.atan(mp.fabs(v.imag/v.real))
                 if θ/mp.pi < ε:
@@ -101,8 +104,8 @@ def traces_from_holonomies(θ,η):
 class ClassicalRileyGroup(RileyGroup):
     """ Represents a Riley group generated by either *finite order* elliptics or parabolics.
     """
-    def __init__(self, p, q, μ):
-        super().__init__(mp.pi/p, mp.pi/q, μ, p, q)
+    def __init__(self, p, q, μ, precision=None):
+        super().__init__(mp.pi/p, mp.pi/q, μ, p, q, precision)
 
 class RileyCuspGroup(ClassicalRileyGroup):
     """ Represents a rational cusp group.
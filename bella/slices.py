@@ -3,6 +3,7 @@
 from . import farey, riley
 from mpmath import mp
 from numpy.polynomial import Polynomial as P
+import numpy as np
 import pandas as pd
 import math
 
@@ -20,6 +21,23 @@ class ConvergenceFailedException(Exception):
         return f"Convergence failed at r/s = {self.r}/{self.s}, gen powers {self.m} {self.n}, polynomial {self.poly}"
 
 
+def _substituted_traces(θ, η, pow_X, pow_Y):
+    """ Return (trX, trY, trXY) as polynomials in μ for the generators X^pow_X and Y^pow_Y. """
+
+    # Note that the trace of an elliptic element is 2cos(t), where t is the rotation
+    # angle. Thus the trace of powers of X and Y are as follows:
+    trX = P([2*mp.cos(pow_X*θ)])
+    trY = P([2*mp.cos(pow_Y*η)])
+
+    # For X^powX Y^powY we need to compute for a bit, but we get the following. The
+    # z coefficient of the trace polynomial might involve a 0/0 if θ or η is a multiple
+    # of pi, so we need to specifically take 1 in those cases.
+    z_coefficient_X_contribution = 1 if mp.sin(θ) == 0 else mp.sin(pow_X*θ)/mp.sin(θ)
+    z_coefficient_Y_contribution = 1 if mp.sin(η) == 0 else mp.sin(pow_Y*η)/mp.sin(η)
+    trXY = P([ 2*mp.cos(pow_X*θ + pow_Y*η), z_coefficient_X_contribution*z_coefficient_Y_contribution ])
+    return (trX, trY, trXY)
+
+
 def primitive_exterior(θ, η, pow_X, pow_Y, depth, maxsteps=500, extraprec=1000, level_set = -2):
     """ Compute points of the Riley slice exterior on generator angles θ and η.
 
@@ -35,17 +53,8 @@ def primitive_exterior(θ, η, pow_X, pow_Y, depth, maxsteps=500, extraprec=1000
         respectively `pow_X` and `pow_Y`, where `method = "farey"`, and where `level_set` is the same as the eponynous parameter.
     """
 
-    # Note that the trace of an elliptic element is 2cos(t), where t is the rotation
-    # angle. Thus the trace of powers of X and Y are as follows:
-    trX = P([2*mp.cos(pow_X*θ)])
-    trY = P([2*mp.cos(pow_Y*η)])
-
-    # For X^powX Y^powY we need to compute for a bit, but we get the following. The
-    # z coefficient of the trace polynomial might involve a 0/0 if θ or η is a multiple
-    # of pi, so we need to specifically take 1 in those cases.
-    z_coefficient_X_contribution = 1 if mp.sin(θ) == 0 else mp.sin(pow_X*θ)/mp.sin(θ)
-    z_coefficient_Y_contribution = 1 if mp.sin(η) == 0 else mp.sin(pow_Y*η)/mp.sin(η)
-    trXY = P([ 2*mp.cos(pow_X*θ + pow_Y*η), z_coefficient_X_contribution*z_coefficient_Y_contribution ])
+    # In the parabolic case the recursion can be done in exact integer arithmetic.
+    trX, trY, trXY = farey.integral_traces(*_substituted_traces(θ, η, pow_X, pow_Y))
 
     # We can now compute the Farey polynomials after substitution.
     def _internal_generator():
@@ -59,6 +68,83 @@ def primitive_exterior(θ, η, pow_X, pow_Y, depth, maxsteps=500, extraprec=1000
     return pd.DataFrame.from_records(([float(pt.real), float(pt.imag), pow_X, pow_Y, 'farey', level_set] for pt in _internal_generator()), columns=['x','y','pow_x','pow_y', 'method', 'level_set'])
 
 
+def level_curves(θ, η, pow_X, pow_Y, depth, levels, maxsteps=500, extraprec=1000):
+    """ Compute points along the level curves tr W_r/s = t of the Riley slice on generator angles θ and η.
+
+        The roots are only found once per Farey polynomial, at the first level, and are then followed through the
+        remaining levels by `farey.track_level_set`; so e.g. levels running from -2 out along the negative real axis
+        give the pleating rays, much more cheaply than solving a polynomial for every level.
+
+        Parameters:
+        `θ`, `η` -- parameters of the slice
+        `powX`, `powY` -- what powers of X and Y to take in the Farey words
+        `depth` -- maximal denominator of Farey polynomial to use
+        `levels` -- the values t of the level sets to compute, in the order to follow them.
+        `maxsteps`, `extraprec` -- passed directly to mpmath.polyroots() for the first level.
+
+        Generates: a dataframe with columns `[ x, y, pow_x, pow_y, method, level_set, r, s, root ]` where `x+y*j` is
+        an element of the `level_set` level set of the r/s Farey polynomial, where `pow_x` and `pow_y` are
+        respectively `pow_X` and `pow_Y`, where `method = "continuation"`, and where the points with the same r, s
+        and root lie on the same curve, in the order of `levels`.
+    """
+    levels = list(levels)
+    trX, trY, trXY = farey.integral_traces(*_substituted_traces(θ, η, pow_X, pow_Y))
+
+    def _internal_generator():
+        for (r,s) in farey.walk_tree_bfs(depth):
+            poly = farey.farey_polynomial(r,s,trX,trY,trXY)
+            try:
+                roots = list(farey.solve_polynomial(poly - mp.mpmathify(levels[0]), maxsteps, extraprec))
+                path = farey.track_level_set(poly, levels, roots)
+            except mp.NoConvergence:
+                raise ConvergenceFailedException(r,s,pow_X,pow_Y,poly)
+            for level, points in zip(levels, path):
+                for root, pt in enumerate(points):
+                    yield [float(pt.real), float(pt.imag), pow_X, pow_Y, 'continuation', level, r, s, root]
+
+    return pd.DataFrame.from_records(_internal_generator(), columns=['x','y','pow_x','pow_y', 'method', 'level_set', 'r', 's', 'root'])
+
+
+def exterior_raster(θ, η, extent, resolution, depth, pow_X=1, pow_Y=1, ε=1, accept=None):
+    """ Classify each pixel of a grid of μ values by the first Farey word which shows it is outside the Riley slice.
+
+        Each pixel is tested against the Farey polynomials of denominator up to `depth` (see `farey.classify_grid`),
+        by default with the cone test of `riley.RileyGroup.guess_radial_coordinate`: the trace of W_r/s lies in the
+        cone of angle π*ε about the negative real axis, beyond -2.
+
+        Parameters:
+        `θ`, `η` -- parameters of the slice
+        `extent` -- (xmin, xmax, ymin, ymax), the region of the μ-plane to draw.
+        `resolution` -- (width, height) in pixels, or a single integer for a square raster.
+        `depth` -- maximal denominator of Farey polynomial to use
+        `powX`, `powY` -- what powers of X and Y to take in the Farey words
+        `ε` -- angle of the cone test, as a multiple of π.
+        `accept` -- if not None, a function taking an array of traces to a boolean array, used in place of the cone
+                    test; e.g. lambda v: abs(v) > 2 colours by the first word of large trace.
+
+        Returns: (values, numerators, denominators, extent), arrays of shape (height, width) in image orientation
+        (see `cayley.accumulate_raster`): at each pixel, r/s is the classifying fraction (0/0 if there is none) and
+        values the trace of W_r/s there (nan if there is none). For example, hv.Image(denominators, bounds=(xmin, ymin,
+        xmax, ymax)) draws the pixels coloured by denominator.
+    """
+    width, height = (resolution, resolution) if np.isscalar(resolution) else resolution
+    extent = tuple(float(e) for e in extent)
+    xmin, xmax, ymin, ymax = extent
+
+    # Sample at pixel centres; row 0 is the top edge of the picture.
+    x = xmin + (np.arange(width) + 0.5)*(xmax - xmin)/width
+    y = ymax - (np.arange(height) + 0.5)*(ymax - ymin)/height
+    μ = x[np.newaxis, :] + 1j*y[:, np.newaxis]
+
+    traces = [P([complex(c) for c in t.coef])(μ) for t in _substituted_traces(θ, η, pow_X, pow_Y)]
+
+    if accept is None:
+        def accept(v):
+            return (v.real < -2) & (2*np.arctan(np.abs(v.imag/v.real))/np.pi < ε)
+
+    return farey.classify_grid(*traces, depth, accept) + (extent,)
+
+
 def parabolic_exterior_from_farey(depth, maxsteps=500,extraprec=1000,level_set=-2):
     """ Compute points of the parabolic Riley slice exterior.
 
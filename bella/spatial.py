@@ -0,0 +1,209 @@
+""" Spatial indices over limit points and isometric circles.
+
+    The limit set and isometric circle routines in `cayley` produce large collections of points and circles
+    (as dataframes, or column-oriented chunks of NumPy arrays). The classes here build a static kd-tree
+    over such a collection once, so that questions like "which points lie in this viewport", "which circles
+    contain this point", or "which circles overlap" can be answered without scanning every row.
+"""
+
+import heapq
+import numpy as np
+
+class _BoxTree:
+    """ A static kd-tree over a collection of discs (points being discs of radius zero).
+
+        Items are split at the median of their centres along the wider axis until at most `leaf_size`
+        remain, and each node stores the bounding box of all of the discs below it, so queries only
+        descend into nodes whose box can contain an answer.
+    """
+
+    def __init__(self, x, y, radius, leaf_size=16):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), x.shape)
+
+        order = np.arange(len(x))
+        lo, hi, left, right, boxes = [], [], [], [], []
+        stack = [(0, len(x), -1, False)]
+        while stack:
+            start, end, parent, is_right = stack.pop()
+            node = len(lo)
+            if parent >= 0:
+                (right if is_right else left)[parent] = node
+            items = order[start:end]
+            lo.append(start)
+            hi.append(end)
+            left.append(-1)
+            right.append(-1)
+            if end > start:
+                boxes.append(((x[items] - radius[items]).min(), (x[items] + radius[items]).max(),
+                              (y[items] - radius[items]).min(), (y[items] + radius[items]).max()))
+            else:
+                boxes.append((np.inf, -np.inf, np.inf, -np.inf))
+
+            if end - start > leaf_size:
+                centres = x[items] if np.ptp(x[items]) >= np.ptp(y[items]) else y[items]
+                middle = (end - start)//2
+                order[start:end] = items[np.argpartition(centres, middle)]
+                stack.append((start + middle, end, node, True))
+                stack.append((start, start + middle, node, False))
+
+        self.order = order
+        self.x = x[order]
+        self.y = y[order]
+        self.radius = radius[order]
+        self._lo = lo
+        self._hi = hi
+        self._left = left
+        self._right = right
+        self._boxes = boxes
+
+    def __len__(self):
+        return len(self.order)
+
+    def _is_leaf(self, node):
+        return self._left[node] < 0
+
+    def _children(self, node):
+        return (self._left[node], self._right[node])
+
+    def query_box(self, xmin, xmax, ymin, ymax):
+        """ Return the indices of the items meeting the rectangle [xmin, xmax] x [ymin, ymax].
+
+            For points this is the set of points inside the rectangle (e.g. a viewport).
+        """
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            bxmin, bxmax, bymin, bymax = self._boxes[node]
+            if bxmax < xmin or bxmin > xmax or bymax < ymin or bymin > ymax:
+                continue
+            start, end = self._lo[node], self._hi[node]
+            if xmin <= bxmin and bxmax <= xmax and ymin <= bymin and bymax <= ymax:
+                found.append(np.arange(start, end))
+            elif self._is_leaf(node):
+                # Distance from each centre to the rectangle.
+                dx = np.maximum(np.maximum(xmin - self.x[start:end], self.x[start:end] - xmax), 0)
+                dy = np.maximum(np.maximum(ymin - self.y[start:end], self.y[start:end] - ymax), 0)
+                found.append(start + np.nonzero(dx**2 + dy**2 <= self.radius[start:end]**2)[0])
+            else:
+                stack.extend(self._children(node))
+        return np.sort(self.order[np.concatenate(found)]) if found else np.empty(0, dtype=int)
+
+    def nearest(self, z, k=1):
+        """ Return (distances, indices) of the `k` items nearest to the complex number `z`, nearest first.
+
+            The distance to a disc is the distance to the closed disc, so it is zero for discs containing `z`.
+        """
+        z = complex(z)
+        best = [] # max-heap of (-distance, index) of the best k so far
+        heap = [(0.0, 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            start, end = self._lo[node], self._hi[node]
+            if self._is_leaf(node):
+                distances = np.maximum(np.hypot(self.x[start:end] - z.real, self.y[start:end] - z.imag) - self.radius[start:end], 0)
+                for offset in np.argsort(distances)[:k]:
+                    if len(best) < k:
+                        heapq.heappush(best, (-distances[offset], start + offset))
+                    elif distances[offset] < -best[0][0]:
+                        heapq.heapreplace(best, (-distances[offset], start + offset))
+            else:
+                for child in self._children(node):
+                    bxmin, bxmax, bymin, bymax = self._boxes[child]
+                    dx = max(bxmin - z.real, z.real - bxmax, 0)
+                    dy = max(bymin - z.imag, z.imag - bymax, 0)
+                    heapq.heappush(heap, (float(np.hypot(dx, dy)), child))
+
+        best = sorted((-d, i) for d, i in best)
+        return (np.array([d for d, _ in best]), self.order[np.array([i for _, i in best], dtype=int)])
+
+
+class PointIndex(_BoxTree):
+    """ Spatial index over a collection of points x + yi, e.g. a limit set.
+
+        Supports viewport queries (`query_box`) and nearest neighbour queries (`nearest`); the indices
+        returned refer to the order of the points that were passed in.
+    """
+
+    def __init__(self, x, y, leaf_size=16):
+        super().__init__(x, y, 0, leaf_size)
+
+    @classmethod
+    def from_dataframe(cls, df, leaf_size=16):
+        """ Build an index over the columns x, y of a dataframe or column-oriented chunk. """
+        return cls(df['x'], df['y'], leaf_size)
+
+
+class CircleIndex(_BoxTree):
+    """ Spatial index over a collection of circles with centres x + yi and given radii, e.g. isometric circles.
+
+        Supports viewport queries (`query_box`), point-in-circle queries (`containing`), nearest neighbour
+        queries (`nearest`), and finding overlapping pairs (`overlapping_pairs`); the indices returned refer
+        to the order of the circles that were passed in.
+    """
+
+    def __init__(self, x, y, radius, leaf_size=16):
+        super().__init__(x, y, radius, leaf_size)
+
+    @classmethod
+    def from_dataframe(cls, df, leaf_size=16):
+        """ Build an index over the columns x, y, radius of a dataframe or column-oriented chunk. """
+        return cls(df['x'], df['y'], df['radius'], leaf_size)
+
+    def containing(self, z):
+        """ Return the indices of the circles whose closed discs contain the complex number `z`. """
+        z = complex(z)
+        found = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            bxmin, bxmax, bymin, bymax = self._boxes[node]
+            if not (bxmin <= z.real <= bxmax and bymin <= z.imag <= bymax):
+                continue
+            if self._is_leaf(node):
+                start, end = self._lo[node], self._hi[node]
+                inside = (self.x[start:end] - z.real)**2 + (self.y[start:end] - z.imag)**2 <= self.radius[start:end]**2
+                found.append(start + np.nonzero(inside)[0])
+            else:
+                stack.extend(self._children(node))
+        return np.sort(self.order[np.concatenate(found)]) if found else np.empty(0, dtype=int)
+
+    def overlapping_pairs(self):
+        """ Return an array of shape (N, 2) of index pairs (i, j), i < j, of circles whose open discs intersect.
+
+            Each leaf of the tree is joined against the leaves whose boxes meet its own, so only nearby circles are compared.
+        """
+        leaves = [node for node in range(len(self._lo)) if self._is_leaf(node)]
+        pairs = []
+        for a in leaves:
+            axmin, axmax, aymin, aymax = self._boxes[a]
+            astart, aend = self._lo[a], self._hi[a]
+            stack = [0]
+            while stack:
+                node = stack.pop()
+                bxmin, bxmax, bymin, bymax = self._boxes[node]
+                if bxmax < axmin or bxmin > axmax or bymax < aymin or bymin > aymax:
+                    continue
+                if not self._is_leaf(node):
+                    stack.extend(self._children(node))
+                    continue
+                bstart, bend = self._lo[node], self._hi[node]
+                if bstart < astart:
+                    continue # this pair of leaves is handled from the other side
+                distances = np.hypot(self.x[astart:aend, np.newaxis] - self.x[np.newaxis, bstart:bend],
+                                     self.y[astart:aend, np.newaxis] - self.y[np.newaxis, bstart:bend])
+                overlap = distances < self.radius[astart:aend, np.newaxis] + self.radius[np.newaxis, bstart:bend]
+                i, j = np.nonzero(overlap)
+                i, j = i + astart, j + bstart
+                if bstart == astart:
+                    i, j = i[i < j], j[i < j]
+                pairs.append(np.stack([self.order[i], self.order[j]], axis=1))
+
+        if not pairs:
+            return np.empty((0, 2), dtype=int)
+        pairs = np.concatenate(pairs)
+        return np.sort(pairs, axis=1)
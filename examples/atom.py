@@ -11,10 +11,8 @@ hv.extension('bokeh')
 from mpmath import mp
 import pandas as pd
 from functools import reduce
-import multiprocessing
 from holoviews.operation.datashader import datashade
 import dask.dataframe as dd
-import os
 from holoviews.operation.datashader import ResampleOperation2D
 from bella.hvhelp import makeCircles, pairsToCircles
 import collections
@@ -90,40 +88,14 @@ class AtomGroup(cayley.GroupCache):
 
         super().__init__(cayley.generators_from_circle_inversions(self.circles1+self.circles2, []))
 
-def one_limit_set(n, N, points_per_walk, seed):
-    print(f"    atom.py: limit set computation {n}/{N}")
-
-    # If we can't fork, then we need to compute G in the subprocess. We can't
-    # pass it in as a function parameter due to a bug in mpmath:
-    # https://github.com/mpmath/mpmath/issues/380
-    if 'G' in globals():
-        global G
-    else:
-        print(f"                                          -- can't see G in subprocess, have to recompute")
-        G = AtomGroup(num_generators, radius_denominator)
-
-    df = G.coloured_limit_set_fast(points_per_walk, seed=seed)
-    df.to_csv(f"atom/{n}_{N}.csv")
-
 if __name__ == '__main__':
-    try:
-        os.mkdir('atom')
-    except FileExistsError:
-        pass
-
-    # We want to use the fork method so as to share G across subprocesses
-    # since we can't pickle mpmath objects.
-    try:
-        multiprocessing.set_start_method('fork')
-    except:
-        print("    atom.py Can't fork must spawn")
-
     G = AtomGroup(num_generators, radius_denominator)
     seed = G.fixed_points((0,1))[0]
 
-    with multiprocessing.Pool(maxtasksperchild=1) as pool:
-        _ = pool.starmap(one_limit_set, [[n+1, number_of_walks, points_per_walk, seed] for n in range(number_of_walks)], chunksize=1 )
-    df = dd.read_csv("atom/*.csv")
+    # The generators are sent to the worker processes as strings, since we can't pickle mpmath objects;
+    # each worker gets its own random stream, and the points are streamed straight to disk.
+    cayley.save_chunks_parquet(G.parallel_limit_set(points_per_walk*number_of_walks, tasks=number_of_walks, seed=seed, chunk_size=10**6), "atom.parquet")
+    df = dd.read_parquet("atom.parquet")
 
     print(f"    atom.py has finished computing the limit set, {len(df)} points")
     scatter = hv.Scatter(df, kdims = ['x'], vdims = ['y','colour']).opts(marker='dot', frame_width=width, frame_height=width, size=.1, color='black')\
@@ -10,6 +10,7 @@ hv.extension('bokeh')
 from mpmath import mp
 
 num_points = 2*10**7
+num_walkers = 10**4
 
 B1 = cayley.GroupCache([mp.matrix([[0,-1],[1,0]]), mp.matrix([[1j,0],[0,-1j]]), mp.matrix([[1,1],[0,1]]), mp.matrix([[1j,-1],[0, -1j]])])
 ω = (-1+1j*mp.sqrt(3))/2
@@ -21,7 +22,7 @@ B5 = cayley.GroupCache([mp.matrix([[1,1],[0,1]]), mp.matrix([[1,φ],[0,1]]), mp.
 
 
 print("O_1")
-df = B1.coloured_limit_set_fast(num_points)
+df = B1.coloured_limit_set_fast(num_points, walkers=num_walkers)
 scatter = hv.Scatter(df, kdims = ['x'], vdims = ['y','colour'])\
             .opts(marker = "dot", size = 0.1,  color = 'colour', frame_width=2000, frame_height=2000, data_aspect=1, cmap='Set1')\
               .redim(x=hv.Dimension('x', range=(-2,2)),y=hv.Dimension('y', range=(-2, 2)))
@@ -32,7 +33,7 @@ del scatter
 del B1
 
 print("O_3")
-df = B3.coloured_limit_set_fast(num_points)
+df = B3.coloured_limit_set_fast(num_points, walkers=num_walkers)
 scatter = hv.Scatter(df, kdims = ['x'], vdims = ['y','colour'])\
             .opts(marker = "dot", size = 0.1,  color = 'colour', frame_width=2000, frame_height=2000, data_aspect=1, cmap='Set1')\
               .redim(x=hv.Dimension('x', range=(-2,2)),y=hv.Dimension('y', range=(-2, 2)))
@@ -43,7 +44,7 @@ del scatter
 del B3
 
 print("O_2")
-df = B2.coloured_limit_set_fast(num_points)
+df = B2.coloured_limit_set_fast(num_points, walkers=num_walkers)
 scatter = hv.Scatter(df, kdims = ['x'], vdims = ['y','colour'])\
             .opts(marker = "dot", size = 0.1,  color = 'colour', frame_width=2000, frame_height=2000, data_aspect=1, cmap='Set1')\
               .redim(x=hv.Dimension('x', range=(-2,2)),y=hv.Dimension('y', range=(-2, 2)))
@@ -54,7 +55,7 @@ del scatter
 del B2
 
 print("O_5")
-df = B5.coloured_limit_set_fast(num_points)
+df = B5.coloured_limit_set_fast(num_points, walkers=num_walkers)
 scatter = hv.Scatter(df, kdims = ['x'], vdims = ['y','colour'])\
             .opts(marker = "dot", size = 0.1,  color = 'colour', frame_width=2000, frame_height=2000, data_aspect=1, cmap='Set1')\
               .redim(x=hv.Dimension('x', range=(-2,2)),y=hv.Dimension('y', range=(-2, 2)))
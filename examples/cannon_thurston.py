@@ -32,7 +32,7 @@ for name, val in [
             cusp = farey.approximate_pleating_ray(p,q,mp.inf,mp.inf, R=30, N=200)[-1]
 
             G = riley.ClassicalRileyGroup(mp.inf,mp.inf, cusp)
-            limit_points = G.limit_set_dfs(10)
+            limit_points = G.limit_set_adaptive(0.005, max_depth=20)
             scatter = hv.Path(limit_points, kdims = ['x','y']).opts(line_width = 0.2,  color = 'black').redim(x=hv.Dimension('x', range=(-2,2)),y=hv.Dimension('y', range=(-2, 2)))
 
             fn = f'cannon_thurston_{name}_{n}'
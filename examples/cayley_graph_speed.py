@@ -1,6 +1,7 @@
 """ Example: profile GroupCache.free_cayley_graph_mc() vs GroupCache.cayley_graph_mc()
 
-    The output should show that the free_* version is much faster than the non-free_* version.
+    The non-free_* version checks relators using the compiled GroupCache.automaton, so the output
+    should show that it is only a little slower than the free_* version.
 """
 
 from bella import cayley
@@ -1,6 +1,8 @@
 import pytest
 from bella import cayley
 from mpmath import mp
+import numpy as np
+import random
 
 def matrix_almosteq_up_to_sign(M,N):
     return matrix_almosteq(M,N) or matrix_almosteq(M,-N)
@@ -150,3 +152,489 @@ def test_circle_space():
     M = cayley.action_on_circles(mp.matrix([[1,0],[4j,1]]))
     image = M @ horizontal_line_2
     assert mp.chop(image/image[0]) == circle_2
+
+def test_evaluate_words():
+    λ = 2+3j
+    X = mp.matrix([[λ,0],[0,λ**-1]])
+    Y = mp.matrix([[-1j*(4+3j), -1j],[-1j, 0]])
+    G = cayley.GroupCache([X,Y])
+    assert G.generator_array.shape == (4,2,2)
+
+    words = [(), (0,), (1,0), (3,2,1), (0,1,2,3,0,1)]
+    matrices = G.evaluate_words(words)
+    assert matrices.shape == (len(words),2,2)
+    for word, M in zip(words, matrices):
+        assert matrix_almosteq(mp.matrix(M.tolist()), G[word], 1e-8)
+    assert G.evaluate_words([]).shape == (0,2,2)
+
+def test_bfs_levels():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y], [(0,1,2,3)])
+
+    assert [w for w,_ in G.free_cayley_graph_bfs_matrices(4)] == list(G.free_cayley_graph_bfs(4))
+    assert [w for w,_ in G.cayley_graph_bfs_matrices(4)] == list(G.cayley_graph_bfs(4))
+    for w, m in G.cayley_graph_bfs_matrices(4):
+        assert matrix_almosteq(m, G[w])
+
+    levels = list(G.free_cayley_graph_bfs_levels(3, machine_precision=True))
+    assert [len(words) for words, _ in levels] == [4, 12, 36]
+    for words, matrices in levels:
+        assert matrices.shape == (len(words),2,2)
+        for w, m in zip(words, matrices):
+            assert matrix_almosteq(mp.matrix(m.tolist()), G[w], 1e-8)
+
+    df_mp = G.limit_set_bfs(4, seed=1j)
+    df_np = G.limit_set_bfs(4, seed=1j, machine_precision=True)
+    assert len(df_mp) == len(df_np)
+    assert (df_mp['colour'] == df_np['colour']).all()
+    assert ((df_mp['x'] - df_np['x']).abs() < 1e-8).all()
+    assert ((df_mp['y'] - df_np['y']).abs() < 1e-8).all()
+
+def test_word_cache():
+    cache = cayley.WordCache(maxsize=2)
+    cache[(0,)] = 'a'
+    cache[(1,)] = 'b'
+    assert cache.get((0,)) == 'a'
+    cache[(2,)] = 'c' # evicts (1,), the least recently used
+    assert (1,) not in cache and (0,) in cache and (2,) in cache
+    assert cache.get((1,)) is None
+    assert cache.info()['hits'] == 1 and cache.info()['misses'] == 1 and cache.evictions == 1
+    assert cache.nbytes == 0 # sizes are only estimated when maxbytes is set
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0 and cache.hits == 0
+
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y], cache_size=10)
+    for w in G.free_cayley_graph_bfs(4):
+        assert matrix_almosteq(G[w], mp.matrix(G.evaluate_words([w])[0].tolist()), 1e-8)
+    assert len(G.cache) == 10
+    G.clear_cache()
+    assert len(G.cache) == 0
+
+    # A lookup is one hit or one miss, however many suffixes are tried.
+    G[(0,1,0,1,0)]
+    assert G.cache.info()['misses'] == 1 and G.cache.hits == 0
+    G[(1,0,1,0,1,0)]
+    G[(1,0,1,0,1,0)]
+    G[G.encode_word((1,1,0,1,0))]
+    assert G.cache.misses == 3 and G.cache.hits == 1
+
+    bytes_bounded = cayley.GroupCache([X,Y], cache_size=None, cache_bytes=20000)
+    for w in bytes_bounded.free_cayley_graph_bfs(4):
+        bytes_bounded[w]
+    assert 0 < bytes_bounded.cache.nbytes <= 20000
+
+def test_relator_automaton():
+    alpha = mp.exp(1j*mp.pi/2)
+    beta = mp.exp(1j*mp.pi/3)
+    X = mp.matrix([[alpha,1],[0,mp.conj(alpha)]])
+    Y = mp.matrix([[beta,0],[2+2j,mp.conj(beta)]])
+    G = cayley.GroupCache([X,Y], [(0,)*2,(1,)*3])
+
+    brute_force_reduced = lambda word: not any(word[:len(r)] == r for r in G.relators)
+    for word in G.free_cayley_graph_bfs(5):
+        assert G.is_reduced_from_left(word) == brute_force_reduced(word)
+
+    def brute_force_bfs(depth):
+        last_list = [()]
+        for n in range(depth):
+            this_list = [(x,) + w for w in last_list for x in range(4) if w == () or brute_force_reduced((x,) + w)]
+            yield from this_list
+            last_list = this_list
+    assert list(G.cayley_graph_bfs(6)) == list(brute_force_bfs(6))
+
+    for word in G.cayley_graph_mc(8, 20):
+        assert all(brute_force_reduced(word[n:]) for n in range(len(word)))
+
+def test_chunked_limit_sets(tmp_path):
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y])
+
+    chunks = list(G.limit_set_bfs(4, seed=1j, chunk_size=7))
+    assert all(len(chunk['x']) == 7 for chunk in chunks[:-1]) and 0 < len(chunks[-1]['x']) <= 7
+    df = G.limit_set_bfs(4, seed=1j)
+    assert cayley.chunks_to_dataframe(chunks).equals(df)
+
+    chunks = list(G.limit_set_bfs(4, seed=1j, machine_precision=True, chunk_size=7))
+    assert all(len(chunk['x']) == 7 for chunk in chunks[:-1])
+    assert (cayley.chunks_to_dataframe(chunks)['colour'] == df['colour']).all()
+
+    # Seed the walk at a finite point, which can never be sent to infinity and dropped.
+    random.seed(0)
+    chunks = list(G.coloured_limit_set_fast(100, seed=1j, chunk_size=32))
+    assert [len(chunk['colour']) for chunk in chunks] == [32,32,32,4]
+    assert set(chunks[0].keys()) == {'x','y','colour'}
+
+    filename = tmp_path / "points.npy"
+    cayley.save_chunks_npy(iter(chunks), filename, block_size=10)
+    records = np.load(filename)
+    assert len(records) == 100
+    assert (records['colour'] == np.concatenate([chunk['colour'] for chunk in chunks])).all()
+    assert (records['x'] == np.concatenate([chunk['x'] for chunk in chunks])).all()
+
+def test_multi_walker_limit_set():
+    # A Fuchsian group, so the limit set is the extended real line.
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2,1]])
+    G = cayley.GroupCache([X,Y])
+
+    # Points which land on infinity are dropped.
+    df = G.coloured_limit_set_fast(1000, walkers=64, random_state=0)
+    assert 900 < len(df) <= 1000
+    assert set(df.columns) == {'x','y','colour'}
+    assert (df['y'].abs() < 1e-8).all()
+    assert set(df['colour']) <= set(range(4))
+    assert df.equals(G.coloured_limit_set_fast(1000, walkers=64, random_state=0))
+
+    df = G.coloured_limit_set_fast(1000, seed=0, walkers=64, random_state=0)
+    assert (df['y'] == 0).all()
+    assert df.equals(G.coloured_limit_set_fast(1000, seed=0, walkers=64, random_state=0))
+
+    chunks = list(G.coloured_limit_set_fast(1000, seed=0, walkers=64, random_state=0, chunk_size=100))
+    assert cayley.chunks_to_dataframe(chunks).equals(df)
+
+def test_parallel_limit_set():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2,1]])
+    G = cayley.GroupCache([X,Y])
+
+    rebuilt = cayley.deserialise_generators(G.serialise_generators())
+    assert matrix_almosteq(rebuilt[0], X) and matrix_almosteq(rebuilt[1], Y)
+
+    df = G.parallel_limit_set(1000, processes=2, tasks=3, walkers=50, seed=0, random_state=1)
+    assert len(df) == 1000
+    assert (df['y'] == 0).all()
+    again = G.parallel_limit_set(1000, processes=2, tasks=3, walkers=50, seed=0, random_state=1)
+    assert df.sort_values(['x','colour']).reset_index(drop=True).equals(again.sort_values(['x','colour']).reset_index(drop=True))
+
+def test_limit_set_raster():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2,1]])
+    G = cayley.GroupCache([X,Y])
+    extent = (-2, 2, -1, 1)
+
+    df = G.coloured_limit_set_fast(5000, seed=0, walkers=100, random_state=4)
+    raster, returned_extent = G.limit_set_raster(5000, extent, (40, 20), seed=0, walkers=100, random_state=4)
+    assert raster.shape == (20, 40) and returned_extent == (-2.0, 2.0, -1.0, 1.0)
+    inside = df[(df['x'] >= -2) & (df['x'] < 2)]
+    assert raster.sum() == len(inside)
+    # The limit set is the real line y = 0, which is the top edge of row 10.
+    assert raster[10].sum() == raster.sum()
+
+    coloured, _ = G.limit_set_raster(5000, extent, 10, by_colour=True, seed=0, walkers=100, random_state=4)
+    assert coloured.shape == (4, 10, 10)
+    assert coloured.sum() == raster.sum()
+    for colour in range(4):
+        assert coloured[colour].sum() == (inside['colour'] == colour).sum()
+
+    parallel, _ = G.limit_set_raster(5000, extent, 10, seed=0, walkers=100, random_state=4, processes=2, tasks=2)
+    assert parallel.shape == (10, 10) and parallel.sum() > 0
+
+    rng = np.random.default_rng(5)
+    chunk = {'x': rng.uniform(-3, 3, 10000), 'y': rng.uniform(-2, 2, 10000)}
+    histogram, _, _ = np.histogram2d(chunk['x'], chunk['y'], bins=[40, 20], range=[extent[:2], extent[2:]])
+    expected = histogram.T[::-1]
+    assert (cayley.accumulate_raster(np.zeros((20, 40), dtype=np.int64), chunk, extent) == expected).all()
+    assert (cayley.accumulate_raster(np.zeros((20, 40), dtype=np.int64, order='F'), chunk, extent) == expected).all()
+
+def test_limit_set_adaptive():
+    # Schottky group preserving the real line.
+    X = mp.matrix([[mp.cosh(1), mp.sinh(1)],[mp.sinh(1), mp.cosh(1)]])
+    Y = mp.matrix([[1.25, 0.1125],[5, 1.25]])
+    G = cayley.GroupCache([X,Y])
+
+    assert mp.almosteq(cayley.mobius_attracting_fixed_point(X), 1)
+    assert cayley.mobius_attracting_fixed_point(mp.matrix([[2,0],[0,0.5]])) == mp.inf
+
+    coarse = G.limit_set_adaptive(0.1)
+    fine = G.limit_set_adaptive(0.01)
+    assert len(fine) > len(coarse) > 0
+    assert (fine['y'].abs() < 1e-10).all()
+    assert set(fine['colour']) == {0,1,2,3}
+
+    segments = G.limit_set_adaptive(0.01, segments=True)
+    assert list(segments.columns) == ['x0','y0','x1','y1','colour']
+    assert (((segments['x0'] - segments['x1'])**2 + (segments['y0'] - segments['y1'])**2) < 0.01**2).mean() > 0.9
+
+    exact = G.limit_set_adaptive(0.1, machine_precision=False)
+    assert len(exact) == len(coarse)
+
+def test_free_cayley_graph_dfs():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y])
+
+    words = list(G.free_cayley_graph_dfs(4))
+    assert words[:3] == [(3,), (3,3), (3,3,3)]
+    assert sorted(words) == sorted(G.free_cayley_graph_bfs(4))
+    assert list(G.free_cayley_graph_dfs(0)) == list(G.free_cayley_graph_bfs(0)) == []
+    assert len(G.limit_set_dfs(0)) == 0
+    assert sorted(G.free_cayley_graph_dfs(4, rtl=True)) == sorted(words)
+    assert list(G.free_cayley_graph_dfs(4, rtl=True))[:3] == [(3,), (3,3), (3,3,3)]
+    assert list(G.free_cayley_graph_dfs(3, rtl=True))[3] == (2,3,3)
+    assert list(G.free_cayley_graph_dfs(3))[3] == (3,3,2)
+
+    pruned = list(G.free_cayley_graph_dfs(4, prune=lambda w: w[0] != 0))
+    assert all(w[0] == 0 or len(w) == 1 for w in pruned)
+    assert len(pruned) == 3 + (1 + 3 + 9 + 27)
+    seen = []
+    list(G.free_cayley_graph_dfs(3, prune=lambda w: seen.append(w)))
+    assert seen and all(len(w) < 3 for w in seen)
+
+    df = G.limit_set_dfs(4, seed=1j)
+    assert len(df) == len(G.limit_set_bfs(4, seed=1j))
+
+def test_isometric_circle_arrays():
+    alpha = mp.exp(1j*mp.pi/2)
+    beta = mp.exp(1j*mp.pi/3)
+    X = mp.matrix([[alpha,1],[0,mp.conj(alpha)]])
+    Y = mp.matrix([[beta,0],[3+3j,mp.conj(beta)]])
+    G = cayley.GroupCache([X,Y], [(0,)*2,(1,)*3])
+
+    df = G.coloured_isometric_circles_bfs(6)
+    circles = G.isometric_circle_arrays(6, prune=False)
+    assert len(circles['x']) == len(df)
+    assert np.allclose(circles['x'], df['x']) and np.allclose(circles['y'], df['y']) and np.allclose(circles['radius'], df['radius'])
+    assert (circles['colour'] == df['colour']).all()
+
+    df = G.coloured_isometric_circles_bfs(6, min_radius=0.05, bounding_radius=2)
+    fast = G.coloured_isometric_circles_bfs(6, min_radius=0.05, bounding_radius=2, machine_precision=True)
+    assert np.allclose(fast['radius'], df['radius'])
+
+    pruned = G.isometric_circle_arrays(6, min_radius=0.05)
+    assert len(pruned['x']) <= len(fast) and (pruned['radius'] >= 0.05).all()
+
+def test_mobius_arrays():
+    rng = np.random.default_rng(2)
+    M = rng.normal(size=(50,2,2)) + 1j*rng.normal(size=(50,2,2))
+    M[0] = [[2,1],[0,0.5]] # fixes infinity and -2/3
+    M[1] = [[1,1],[0,1]] # parabolic, fixing only infinity
+    M[2] = [[1,0],[1,1]] # parabolic, fixing 0
+    M[3] = [[1j,0],[0,-1j]] # elliptic of order 2
+    M[4] = np.eye(2)
+
+    fixed = cayley.mobius_fixed_points_array(M)
+    for m, points in zip(M, fixed):
+        expected = cayley.mobius_fixed_points(mp.matrix(m.tolist()))
+        expected = [np.inf if p == mp.inf else complex(p) for p in expected]
+        assert np.allclose(points, expected*(3-len(expected)))
+
+    assert np.allclose(cayley.mobius_action_array(M, fixed[:,1]), fixed[:,1])
+    assert np.isinf(cayley.mobius_action_array(M[:2], np.inf)).all()
+    assert cayley.mobius_action_array(M[2], np.inf) == 1
+    assert np.isinf(cayley.mobius_action_array(M[2], -1))
+    assert np.allclose(cayley.mobius_trace_array(M), M[:,0,0] + M[:,1,1])
+
+    kinds, multipliers = cayley.mobius_classify_array(M)
+    assert list(kinds[:5]) == ['loxodromic', 'parabolic', 'parabolic', 'elliptic', 'identity']
+    assert np.isclose(multipliers[0], 4) and np.isclose(multipliers[3], -1)
+    assert (np.abs(multipliers) >= 1 - 1e-12).all()
+
+def test_action_on_circles_array():
+    rng = np.random.default_rng(4)
+    M = rng.normal(size=(6,2,2)) + 1j*rng.normal(size=(6,2,2))
+    centre, radius = 0.3+0.2j, 0.7
+    circle = cayley.circle_in_circle_space(centre, radius)
+    points = centre + radius*np.exp(2j*np.pi*np.arange(3)/3)
+
+    images = cayley.map_circles_array(M, np.array([circle.tolist()], dtype=float)[:,:,0])
+    for oph in (True, False):
+        A = cayley.action_on_circles_array(M, oph)
+        for m, a in zip(M, A):
+            exact = cayley.action_on_circles(mp.matrix(m.tolist()), oph)
+            assert np.allclose(a, np.array(exact.tolist(), dtype=float))
+
+            # The image circle passes through the images of three points on the circle.
+            image_centre, image_radius, is_line = cayley.circle_space_to_circle_or_line(exact @ circle)
+            assert not is_line
+            moved = cayley.mobius_action_array(m, points if oph else points.conj())
+            assert np.allclose(np.abs(moved - complex(image_centre)), float(image_radius))
+
+    for m, image in zip(M, images[:,0,:]):
+        image_centre, image_radius, _ = cayley.circle_space_to_circle_or_line(mp.matrix(image.tolist()))
+        assert np.allclose(np.abs(cayley.mobius_action_array(m, points) - complex(image_centre)), float(image_radius))
+
+def test_circle_orbit_arrays():
+    X = mp.matrix([[0,-1],[1,0]]) # z -> -1/z preserves the unit circle
+    Y = mp.matrix([[1,2],[0,1]])
+    G = cayley.GroupCache([X,Y], [(0,0)])
+    unit_circle = cayley.circle_in_circle_space(0+0j, 1)
+    small_circle = cayley.circle_in_circle_space(0.5+0j, 0.25)
+
+    orbit = G.circle_orbit_arrays([unit_circle, small_circle], 3)
+    x, y, radius, word, seed = orbit.T
+    assert (orbit[:2,3:] == [[0,0],[0,1]]).all() and np.allclose(radius[:2], [1,0.25])
+    # X(unit circle) is the unit circle again, so it is deduplicated away.
+    assert not ((word == 1) & (seed == 0)).any()
+    assert len(np.unique(np.round(orbit[:,:3], 6), axis=0)) == len(orbit)
+
+    # Each circle is the image of its seed under its word.
+    for row in orbit:
+        letters = []
+        code = int(row[3])
+        while code:
+            letters.append(code % 5 - 1)
+            code //= 5
+        M = cayley.to_complex128(G[tuple(letters)])
+        centre, r = (0, 1) if row[4] == 0 else (0.5, 0.25)
+        points = cayley.mobius_action_array(M, centre + r*np.exp(2j*np.pi*np.arange(3)/3))
+        assert np.allclose(np.abs(points - (row[0] + 1j*row[1])), row[2])
+
+    pruned = G.circle_orbit_arrays([small_circle], 3, min_radius=0.1)
+    assert (pruned[:,2] >= 0.1).all() and len(pruned) < len(G.circle_orbit_arrays([small_circle], 3))
+
+    # Deduplication is by distance, not by rounding: circles either side of a multiple of tol are merged, and
+    # distinct circles far beyond the range of int64 multiples of tol are not.
+    straddling = [cayley.circle_in_circle_space(0.4999999999e-9, 1), cayley.circle_in_circle_space(0.5000000001e-9, 1)]
+    assert len(G.circle_orbit_arrays(straddling, 0)) == 1
+    assert len(G.circle_orbit_arrays(straddling, 0, tol=0)) == 2
+    huge = [cayley.circle_in_circle_space(1e12, 1e11), cayley.circle_in_circle_space(2e12, 1e11)]
+    assert len(G.circle_orbit_arrays(huge, 0)) == 2
+
+def test_precision_policy():
+    X = mp.matrix([[mp.cosh(1),mp.sinh(1)],[mp.sinh(1),mp.cosh(1)]])
+    Y = mp.matrix([[mp.exp(0.3j),0.5],[0.7j,mp.exp(-0.3j)]])
+    Y = Y/mp.sqrt(cayley.simple_det(Y))
+    word = (0,1,2,3,1,1,0)*3
+    exact = cayley.to_complex128(cayley.GroupCache([X,Y])[word])
+
+    G = cayley.GroupCache([X,Y], precision='double')
+    assert isinstance(G[word], np.ndarray) and G[word].dtype == np.complex128
+    assert np.allclose(G[word], exact, rtol=1e-8)
+    assert G.precision.evaluations == len(word) and G.precision.escalations == 0
+
+    # With a tiny threshold every long enough product is escalated, and the answers are correctly rounded.
+    policy = cayley.PrecisionPolicy('adaptive', dps=50, threshold=0)
+    G = cayley.GroupCache([X,Y], precision=policy)
+    assert np.allclose(G[word], exact, rtol=1e-14)
+    assert 0 < policy.escalations <= policy.evaluations == len(word)
+    assert policy.info()['max_drift'] > 0
+
+    H = cayley.GroupCache([X,Y], precision=cayley.PrecisionPolicy('adaptive', threshold=1))
+    H[word]
+    assert H.precision.escalations == 0
+
+    G = cayley.GroupCache([X,Y], precision=cayley.PrecisionPolicy('mp', dps=20))
+    assert isinstance(G[word], mp.matrix) and mp.almosteq(G[word][0,0], complex(exact[0,0]), rel_eps=1e-15)
+
+    with pytest.raises(ValueError):
+        cayley.PrecisionPolicy('quad')
+
+def test_precision_policy_bfs():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    exact = cayley.GroupCache([X,Y])
+    points = exact.limit_set_bfs(4, seed=1j)
+    circles = exact.coloured_isometric_circles_bfs(4)
+
+    for mode in cayley.PrecisionPolicy.modes:
+        G = cayley.GroupCache([X,Y], precision=cayley.PrecisionPolicy(mode, dps=15))
+        df = G.limit_set_bfs(4, seed=1j)
+        assert np.allclose(df[['x','y']], points[['x','y']]) and (df['colour'] == points['colour']).all()
+        df = G.coloured_isometric_circles_bfs(4)
+        assert np.allclose(df[['x','y','radius']], circles[['x','y','radius']])
+        for w, m in G.free_cayley_graph_bfs_matrices(3):
+            assert np.allclose(cayley.to_complex128(m), cayley.to_complex128(exact[w]))
+        if mode == 'mp':
+            # The products are rounded at the policy's precision, not the global one.
+            Z = mp.matrix([[1,mp.sqrt(2)],[0,1]])
+            H = cayley.GroupCache([Z,Y], precision=cayley.PrecisionPolicy(mode, dps=15))
+            assert all(m[0,1].real._mpf_[3] <= 53 for _, m in H.free_cayley_graph_bfs_matrices(3))
+        else:
+            assert G.precision.evaluations > 0
+
+def test_limit_set_stats():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y])
+
+    random.seed(1)
+    df, stats = G.coloured_limit_set_fast(200, seed=1j, rebase_when=2, renormalise_every=16, return_stats=True)
+    assert stats['rebases'] > 0 and stats['renormalisations'] > 0 and stats['generator_det_error'] == 0
+    assert len(df) + stats['nonfinite'] == 200 and (np.hypot(df['x'], df['y']) > 2).sum() == stats['rebases']
+    for off in (None, 0):
+        _, stats = G.coloured_limit_set_fast(50, seed=1j, renormalise_every=off, return_stats=True)
+        assert stats['renormalisations'] == 0
+    for bad in (-1, 1.5):
+        with pytest.raises(ValueError):
+            G.coloured_limit_set_fast(10, seed=1j, renormalise_every=bad)
+    # Points made with mpmath's complex type are checked for finiteness too.
+    df = G.coloured_limit_set_fast(50, seed=1j, complexify=mp.mpc)
+    assert len(df) == 50
+
+    # Generators of determinant -1 are Möbius maps just the same.
+    _, stats = cayley.GroupCache([mp.matrix([[0,1],[1,0]]), Y]).coloured_limit_set_fast(10, seed=1j, return_stats=True)
+    assert stats['generator_det_error'] == 0
+
+    chunks, stats = G.coloured_limit_set_fast(100, seed=mp.inf, walkers=10, chunk_size=30, random_state=0, return_stats=True)
+    points = sum(len(chunk['x']) for chunk in chunks)
+    assert points + stats['nonfinite'] == 100 and stats['nonfinite'] > 0 and stats['renormalisations'] == 100
+
+def test_encoded_words():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y], [(0,1)*3])
+
+    word = (0,1,3,3,2)
+    code = G.encode_word(word)
+    assert G.decode_word(code) == word and G.encode_word(()) == 0 and G.decode_word(0) == ()
+    assert code % 5 - 1 == word[0] and G.decode_word(code // 5) == word[1:]
+    assert matrix_almosteq(G[code], G[word]) and matrix_almosteq(G[np.int64(code)], G[word])
+    with pytest.raises(ValueError):
+        G.decode_word(5)
+
+    for tuples, codes in [(G.free_cayley_graph_bfs(4), G.free_cayley_graph_bfs(4, encoded=True)),
+                          (G.cayley_graph_bfs(7), G.cayley_graph_bfs(7, encoded=True)),
+                          (G.free_cayley_graph_dfs(4), G.free_cayley_graph_dfs(4, encoded=True)),
+                          (G.free_cayley_graph_dfs(4, rtl=True), G.free_cayley_graph_dfs(4, rtl=True, encoded=True))]:
+        assert [G.encode_word(w) for w in tuples] == list(codes)
+
+    tuples = set(G.cayley_graph_bfs(6))
+    assert all(G.decode_word(c) in tuples for c in G.cayley_graph_mc(6, 20, encoded=True))
+    free = set(G.free_cayley_graph_bfs(5))
+    assert all(G.decode_word(c) in free for c in G.free_cayley_graph_mc(5, 20, encoded=True))
+    assert all(G.decode_word(c) in free for c in G.free_cayley_graph_mc(5, 20, rtl=False, encoded=True))
+    assert all(len(w) == 6 for w in G.cayley_graph_mc(6, 5, yield_shorter=False))
+
+def test_fancywords():
+    X = mp.matrix([[1,2],[0,1]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y], names=['a','b'])
+    assert G.fancyword_to_word('abAB') == (0,1,2,3)
+    assert matrix_almosteq(G['abAB'], G[(0,1,2,3)]) and matrix_almosteq(G[''], mp.eye(2))
+    assert 'abAB' in G.cache
+    with pytest.raises(KeyError):
+        G['abc']
+
+    fancywords = ['a', 'abAB', 'bbaBA', 'A'*7]
+    exact = G.evaluate_fancywords(fancywords)
+    fast = G.evaluate_fancywords(fancywords, machine_precision=True)
+    for word, M, N in zip(fancywords, exact, fast):
+        assert matrix_almosteq(M, G[G.fancyword_to_word(word)]) and np.allclose(N, cayley.to_complex128(M))
+
+    H = cayley.GroupCache([X,Y], names=['α','β'])
+    assert H.fancyword_to_word('αΒβ') == (0,3,1)
+
+def test_evaluate_trie():
+    X = mp.matrix([[mp.cosh(1),mp.sinh(1)],[mp.sinh(1),mp.cosh(1)]])
+    Y = mp.matrix([[1,0],[2+1j,1]])
+    G = cayley.GroupCache([X,Y], names=['a','b'])
+    words = [(0,1,2), (1,2), (), (3,0,1,2), 'bAB', G.encode_word((1,1,0)), (1,2)]
+    expected = [G[w] for w in words]
+    G.clear_cache()
+
+    exact = G.evaluate_trie(words)
+    assert len(G.cache) == 0
+    assert all(matrix_almosteq(M, N) for M, N in zip(exact, expected))
+
+    fast = G.evaluate_trie(words, machine_precision=True)
+    assert fast.shape == (len(words), 2, 2)
+    assert np.allclose(fast, [cayley.to_complex128(M) for M in expected])
+
+    H = cayley.GroupCache([X,Y], precision=cayley.PrecisionPolicy('adaptive', threshold=0))
+    adaptive = H.evaluate_trie([w for w in words if not isinstance(w, str)])
+    assert np.allclose(adaptive, [cayley.to_complex128(M) for M, w in zip(expected, words) if not isinstance(w, str)], rtol=1e-14)
+    assert H.precision.escalations > 0
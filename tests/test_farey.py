@@ -1,8 +1,9 @@
 import pytest
 
-from bella import farey, riley, cayley
+from bella import farey, riley, cayley, slices
 from numpy.polynomial import Polynomial as P
 from mpmath import mp
+import numpy as np
 
 def test_farey_word():
     # Our Farey words are exactly those of [KS94] except reversed, and our W_{p/q} is their W_{1-p/q}. So
@@ -161,3 +162,120 @@ def test_fractions():
     assert farey.continued_fraction(-mp.pi) == [-4, 1, 6, 15, 1, 292, 1, 1, 1, 2]
 
 
+
+def test_integer_polynomial():
+    a = farey.IntegerPolynomial([3, -2**70, 0, 5] * 10)
+    b = farey.IntegerPolynomial([-1, 7] * 12)
+    product = a*b
+    schoolbook = [0]*(len(a) + len(b) - 1)
+    for i, x in enumerate(a.coef):
+        for j, y in enumerate(b.coef):
+            schoolbook[i+j] += x*y
+    assert product.coef == tuple(schoolbook)
+    assert (a - a) == 0 and (2 - b + b) == 2 and (a*3).coef[1] == -3*2**70
+    assert farey.IntegerPolynomial([1, 2, 3]).deriv() == farey.IntegerPolynomial([2, 6])
+    assert farey.IntegerPolynomial([1, 2, 3])(2) == 17
+    assert isinstance(farey.IntegerPolynomial([1, 2]) - 0.5, P)
+
+    traces = riley.traces_from_holonomies(0,0)
+    exact = farey.integral_traces(*traces)
+    assert exact == (farey.IntegerPolynomial([2]), farey.IntegerPolynomial([2]), farey.IntegerPolynomial([2,1]))
+    assert farey.integral_traces(*riley.traces_from_holonomies(mp.pi/3, 0))[0] == riley.traces_from_holonomies(mp.pi/3, 0)[0]
+    for (r,s) in [(1,2), (3,7), (5,24)]:
+        assert list(farey.farey_polynomial(r,s,*exact).coef) == [int(c) for c in farey.farey_polynomial(r,s,*traces).coef]
+    assert isinstance(farey.farey_polynomial_classic(3,7,mp.inf,mp.inf), farey.IntegerPolynomial)
+
+def test_polynomial_cache():
+    farey.clear_polynomial_cache()
+    assert len(farey.polynomial_cache) == 0
+    traces = riley.traces_from_holonomies(mp.pi/3, mp.pi/5)
+    f = farey.farey_polynomial(5,17,*traces)
+    # Only the fractions on the Stern-Brocot path to 5/17 (and 0/1, 1/1) have been computed.
+    assert len(farey.polynomial_cache) <= 17
+    assert farey.farey_polynomial(5,17,*traces) is f
+    assert farey.polynomial_cache.hits > 0
+
+    # The cache is bounded, and keyed on the trace parameters.
+    old_size = farey.polynomial_cache.maxsize
+    farey.polynomial_cache.maxsize = 10
+    for η in range(1, 6):
+        farey.farey_polynomial(3,7,*riley.traces_from_holonomies(mp.pi/3, mp.pi/(η + 5)))
+    assert len(farey.polynomial_cache) == 10
+    farey.polynomial_cache.maxsize = old_size
+
+    # Numbers may be passed for the traces, to evaluate the polynomial at a point.
+    μ = 1+2j
+    values = [t(μ) for t in traces]
+    assert mp.almosteq(farey.farey_polynomial(5,17,*values), f(μ), 1e-60)
+
+    with pytest.raises(farey.FractionOutOfRangeException):
+        farey.farey_polynomial(2,4,*traces)
+
+def test_farey_traces():
+    traces = riley.traces_from_holonomies(mp.pi/3, mp.pi/4)
+    μ = -2+1.5j
+    values = [t(μ) for t in traces]
+    pairs = list(farey.farey_traces(*values, end=12))
+    assert [fraction for fraction, _ in pairs] == list(farey.walk_tree_bfs(12))
+    for (r,s), v in pairs:
+        assert mp.almosteq(v, farey.farey_polynomial(r,s,*traces)(μ), 1e-60)
+        assert mp.almosteq(v, farey.farey_trace(r,s,*values), 1e-60)
+
+    # Arrays of points are evaluated all at once.
+    μs = np.array([0.5j, -3+0.1j, 4-2j])
+    array_values = [np.array([complex(t(z)) for z in μs]) for t in traces]
+    for (r,s), v in farey.farey_traces(*array_values, end=8):
+        assert np.allclose(v, [complex(farey.farey_polynomial(r,s,*traces)(z)) for z in μs])
+    assert np.allclose(farey.farey_trace(3,7,*array_values), [complex(farey.farey_polynomial(3,7,*traces)(z)) for z in μs])
+
+def test_classify_grid():
+    traces = riley.traces_from_holonomies(mp.pi/3, mp.pi/4)
+    x, y = np.meshgrid(np.linspace(-5, 5, 9), np.linspace(-4, 4, 7))
+    μ = x + 1j*y
+    values = [P([complex(c) for c in t.coef])(μ) for t in traces]
+
+    def accept(v):
+        return np.abs(v) > 6
+
+    grid_values, numerators, denominators = farey.classify_grid(*values, 10, accept)
+    assert grid_values.shape == numerators.shape == denominators.shape == μ.shape
+
+    # Compare with trying the fractions one at a time, in order of denominator.
+    fractions = sorted(farey.walk_tree_bfs(10), key=lambda f: (f[1], f[0]))
+    for index in np.ndindex(μ.shape):
+        point = [v[index] for v in values]
+        first = next(((r,s) for (r,s) in fractions if accept(np.array(complex(farey.farey_trace(r,s,*point))))), (0,0))
+        assert (numerators[index], denominators[index]) == first
+        if first == (0,0):
+            assert np.isnan(grid_values[index])
+        else:
+            assert np.isclose(grid_values[index], complex(farey.farey_trace(*first, *point)))
+    assert (denominators == 0).any() and (denominators > 1).any()
+
+    values, numerators, denominators, extent = slices.exterior_raster(0, 0, (5, 9, -1, 1), (16, 8), 12)
+    assert values.shape == (8, 16) and extent == (5.0, 9.0, -1.0, 1.0)
+    # Here the trace 2 - μ of W_0/1 already lies in the cone about the negative real axis beyond -2.
+    assert (numerators == 0).all() and (denominators == 1).all()
+
+def test_track_level_set():
+    f = farey.farey_polynomial_classic(3,7,3,4)
+    levels = -2*np.exp(np.linspace(0, np.log(10), 25))
+    path = farey.track_level_set(f, levels)
+    assert path.shape == (25, f.degree())
+    for k in (0, 12, 24):
+        exact = np.array([complex(z) for z in farey.solve_polynomial(f - levels[k])])
+        assert np.allclose(np.sort_complex(path[k]), np.sort_complex(exact))
+
+    # Following a single root gives the pleating ray: the path from the cusp point out to level -20.
+    ray = farey.approximate_pleating_ray(3,7,3,4, R=20, N=10)
+    start = np.argmin(np.abs(path[0] - complex(ray[-1])))
+    single = farey.track_level_set(f, levels, roots=[path[0][start]])
+    assert np.allclose(single[:,0], path[:,start])
+    assert abs(complex(ray[-1]) - path[0][start]) < 1e-10
+
+    curves = slices.level_curves(0, 0, 1, 1, 4, [-2, -3, -5])
+    assert set(curves['method']) == {'continuation'}
+    for (r,s,root), curve in curves.groupby(['r','s','root']):
+        f = farey.farey_polynomial(r,s,*farey.integral_traces(*riley.traces_from_holonomies(0,0)))
+        for _, row in curve.iterrows():
+            assert abs(f(complex(row.x, row.y)) - row.level_set) < 1e-8
@@ -1,6 +1,7 @@
 import pytest
 from bella import riley,farey
 import mpmath as mp
+import math
 
 
 def test_isometric_circles():
@@ -22,6 +23,8 @@ def test_radial():
 
     G = riley.ClassicalRileyGroup(mp.inf,mp.inf,-43)
     assert(G.guess_radial_coordinate(.001) == (1,1))
+    assert(G.guess_radial_coordinate(.001, end=2) == (1,1))
+    assert(riley.ClassicalRileyGroup(mp.inf,mp.inf,4j).guess_radial_coordinate(.001, end=2) is None)
 
     # # hard examples should converge to something at least
     # G = riley.ClassicalRileyGroup(3, 4, 1.61+2j)
@@ -39,3 +42,15 @@ def test_radial():
     # # assert guesses[-1] == guesses[-2]
     # print(guesses[-1], guesses[-2])
 
+
+def test_string_to_word():
+    G = riley.ClassicalRileyGroup(mp.inf,mp.inf,4j)
+    assert G.string_to_word('XYxy') == (0,1,2,3)
+    assert G.string_to_word('') == ()
+    assert G['XYxy'] == G[(0,1,2,3)]
+
+def test_farey_matrices():
+    G = riley.ClassicalRileyGroup(3,4,1+2j)
+    fractions = [(r,s) for s in range(1,8) for r in range(0,s+1) if math.gcd(r,s) == 1]
+    for M, (r,s) in zip(G.farey_matrices(fractions), fractions):
+        assert mp.mnorm(M - G.farey_matrix(r,s), 1) < 10**-40
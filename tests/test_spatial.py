@@ -0,0 +1,39 @@
+import pytest
+from bella import cayley, spatial
+from mpmath import mp
+import numpy as np
+
+def test_point_index():
+    rng = np.random.default_rng(1)
+    x, y = rng.normal(size=2000), rng.normal(size=2000)
+    index = spatial.PointIndex(x, y)
+
+    inside = index.query_box(-0.5, 1, -1, 0.25)
+    assert (inside == np.nonzero((-0.5 <= x) & (x <= 1) & (-1 <= y) & (y <= 0.25))[0]).all()
+
+    z = 0.3 - 0.2j
+    distances, nearest = index.nearest(z, k=5)
+    assert (nearest == np.argsort(np.abs(x + 1j*y - z))[:5]).all()
+    assert np.allclose(distances, np.abs(x[nearest] + 1j*y[nearest] - z))
+
+def test_circle_index():
+    alpha = mp.exp(1j*mp.pi/2)
+    beta = mp.exp(1j*mp.pi/3)
+    X = mp.matrix([[alpha,1],[0,mp.conj(alpha)]])
+    Y = mp.matrix([[beta,0],[3+3j,mp.conj(beta)]])
+    G = cayley.GroupCache([X,Y], [(0,)*2,(1,)*3])
+    circles = G.isometric_circle_arrays(5, prune=False)
+    x, y, r = circles['x'], circles['y'], circles['radius']
+    index = spatial.CircleIndex.from_dataframe(circles, leaf_size=4)
+
+    z = 0.1 + 0.05j
+    assert (index.containing(z) == np.nonzero(np.abs(x + 1j*y - z) <= r)[0]).all()
+
+    dx = np.maximum(np.maximum(-1 - x, x - 0), 0)
+    dy = np.maximum(np.maximum(-1 - y, y - 1), 0)
+    assert (index.query_box(-1, 0, -1, 1) == np.nonzero(dx**2 + dy**2 <= r**2)[0]).all()
+
+    centres = x + 1j*y
+    overlapping = np.abs(centres[:, np.newaxis] - centres[np.newaxis, :]) < r[:, np.newaxis] + r[np.newaxis, :]
+    expected = {(i, j) for i, j in zip(*np.nonzero(overlapping)) if i < j}
+    assert {tuple(pair) for pair in index.overlapping_pairs()} == expected